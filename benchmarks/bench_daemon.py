@@ -0,0 +1,60 @@
+"""
+Measure the latency of the daemon's queries on a generated package.
+
+Starts a daemon on a temporary socket and prints the timings of the first (cold) query,
+the warm queries with no changes and the queries after one file of the package changed.
+Usage: python -m benchmarks.bench_daemon [subpackages] [modules_per_subpackage] [repeat]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from py2reqs.daemon import Py2ReqsServer, query
+from tests.fixtures import create_files, generated_package_files
+
+
+def timed(function: Callable[[], object], repeat: int) -> List[float]:
+    """Returns the durations of the calls in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main(subpackages: int, modules: int, repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app_dir = Path(tmp_dir).resolve() / 'app'
+        files = generated_package_files(subpackages, modules)
+        create_files(app_dir, files)
+        socket_path = str(Path(tmp_dir) / 'py2reqs.sock')
+        server = Py2ReqsServer(socket_path)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+
+            def requirements() -> object:
+                return query('requirements', socket_path, path=app_dir / 'gen_pkg' / 'main.py', app_dirs=[app_dir])
+
+            def touch_and_requirements() -> object:
+                os.utime(app_dir / 'gen_pkg' / 'sub0' / f'module{modules - 1}.py')
+                return requirements()
+
+            print(f"{len(files)} files, best of {repeat}:")
+            print(f"{'cold':>10}: {timed(requirements, 1)[0]:8.1f} ms")
+            print(f"{'warm':>10}: {min(timed(requirements, repeat)):8.1f} ms")
+            print(f"{'changed':>10}: {min(timed(touch_and_requirements, repeat)):8.1f} ms")
+        finally:
+            query('shutdown', socket_path=socket_path)
+            thread.join()
+            server.server_close()
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args + [10, 30, 5][len(args) :]))
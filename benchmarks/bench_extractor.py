@@ -0,0 +1,48 @@
+"""
+Compare the ImportsExtractor parsing the source with reading the imports from the cached bytecode.
+
+Copies a package, by default the standard library's asyncio, to a temporary folder, compiles it,
+checks that both paths extract the same modules from every file and prints the timings.
+Usage: python -m benchmarks.bench_extractor [package_folder] [repeat]
+"""
+import compileall
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from py2reqs.imports_extractor import ImportsExtractor
+
+
+def extract_all(files: List[Path], package_root: Path, use_bytecode: bool) -> List[List[str]]:
+    """Extracts the modules of all files."""
+    return [ImportsExtractor(f, package_root, use_bytecode=use_bytecode).modules for f in files]
+
+
+def main(package_folder: Path, repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        package_root = Path(tmp_dir).resolve() / package_folder.name
+        shutil.copytree(package_folder, package_root, ignore=shutil.ignore_patterns('__pycache__'))
+        compileall.compile_dir(str(package_root), quiet=1)
+        files = sorted(package_root.rglob('*.py'))
+
+        if extract_all(files, package_root, False) != extract_all(files, package_root, True):
+            raise ValueError("The bytecode and the source extractors found different modules.")
+
+        print(f"{len(files)} files in {package_folder}, best of {repeat}:")
+        for name, use_bytecode in (('ast', False), ('bytecode', True)):
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                extract_all(files, package_root, use_bytecode)
+                timings.append(time.perf_counter() - start)
+            print(f"{name:>10}: {min(timings) * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    import asyncio
+
+    folder = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(asyncio.__file__).parent
+    main(folder.resolve(), int(sys.argv[2]) if len(sys.argv) > 2 else 5)
@@ -0,0 +1,8 @@
+"""
+Runs the py2reqs command line: python -m py2reqs --help
+"""
+import sys
+
+from py2reqs.cli import main
+
+sys.exit(main())
@@ -0,0 +1,157 @@
+"""
+Compute the 3rd party requirements of every file and package of an application in a single pass.
+
+All files are collected once with a shared ImportsCollector. The files form a graph with an edge
+from each file to the files of the local modules it imports. The graph is condensed into strongly
+connected components, i.e. groups of files importing each other in a cycle, which share their requirements.
+The requirements of each component are computed once, in reverse topological order, from its own imports
+and the memoized requirements of the components it depends on.
+"""
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Union
+
+from aspy.refactor_imports.classify import ImportType
+
+from py2reqs.imports_collector import ImportsCollector
+from py2reqs.utils import get_python_file_path
+
+
+def _file_key(path: str) -> str:
+    """
+    The file of a dependencies key, which is a folder for the packages passed to collect_dependencies.
+    """
+    return path if path.endswith('.py') else str(Path(path) / '__init__.py')
+
+
+def strongly_connected_components(graph: Dict[str, List[str]]) -> List[List[str]]:
+    """
+    Returns the strongly connected components of the graph in reverse topological order,
+    i.e. every component comes after all components it has edges to.
+    Iterative version of Tarjan's algorithm, so deep import chains don't hit the recursion limit.
+    """
+    index: Dict[str, int] = dict()
+    low_link: Dict[str, int] = dict()
+    stack: List[str] = []
+    on_stack: Set[str] = set()
+    components: List[List[str]] = []
+
+    for root in graph:
+        if root in index:
+            continue
+        index[root] = low_link[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(graph.get(root, [])))]
+        while work:
+            node, successors = work[-1]
+            for successor in successors:
+                if successor not in index:
+                    index[successor] = low_link[successor] = len(index)
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(graph.get(successor, []))))
+                    break
+                elif successor in on_stack:
+                    low_link[node] = min(low_link[node], index[successor])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low_link[parent] = min(low_link[parent], low_link[node])
+                if low_link[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+    return components
+
+
+class RequirementsAggregator:
+    """
+    Collects the dependencies of many source files with one ImportsCollector
+    and computes the transitive 3rd party top-level modules of each file and package.
+    """
+
+    def __init__(self, collector: Optional[ImportsCollector] = None) -> None:
+        """
+        :param collector: the collector to fill, default: a new collector with the default app_dirs
+        """
+        self.collector = collector or ImportsCollector()
+        self._requirements: Optional[Dict[str, FrozenSet[str]]] = None
+
+    def collect(self, paths: Iterable[Union[str, Path]]) -> None:
+        """
+        Collects the dependencies of the Python files and all Python files in the folders, recursively.
+        Every file is parsed once, no matter how many of the sources import it.
+        """
+        sources = self.collector.sources
+        for path in paths:
+            path = sources.resolve(path)
+            files = sources.python_files(path) if sources.is_dir(path) else [get_python_file_path(path, sources)]
+            for file_path in files:
+                if str(file_path) not in self.collector.visited_files:
+                    self.collector.collect_dependencies(file_path)
+        self._requirements = None
+
+    def _direct_requirements(self, modules: List[str]) -> Set[str]:
+        """
+        The 3rd party top-level modules among the imported modules.
+        """
+        return {m.partition('.')[0] for m in modules if self.collector.classify(m) == ImportType.THIRD_PARTY}
+
+    def file_requirements(self) -> Dict[str, FrozenSet[str]]:
+        """
+        Returns a map of every collected file to its transitive 3rd party top-level modules.
+        Files in the same import cycle share the same set.
+        """
+        if self._requirements is not None:
+            return self._requirements
+
+        graph: Dict[str, List[str]] = dict()
+        direct: Dict[str, Set[str]] = dict()
+        for path, modules in self.collector.dependencies.items():
+            file_path = _file_key(path)
+            local_files = (self.collector.module_files.get(m) for m in modules)
+            graph[file_path] = sorted({f for f in local_files if f and f != file_path})
+            direct[file_path] = self._direct_requirements(modules)
+
+        requirements: Dict[str, FrozenSet[str]] = dict()
+        for component in strongly_connected_components(graph):
+            component_requirements: Set[str] = set()
+            for file_path in component:
+                component_requirements |= direct.get(file_path, set())
+                for dependency in graph.get(file_path, []):
+                    # dependencies outside the component were computed earlier
+                    component_requirements |= requirements.get(dependency, frozenset())
+            frozen = frozenset(component_requirements)
+            for file_path in component:
+                requirements[file_path] = frozen
+        self._requirements = requirements
+        return requirements
+
+    def package_requirements(self) -> Dict[str, FrozenSet[str]]:
+        """
+        Returns a map of every package folder containing collected files to the 3rd party top-level modules
+        of all collected files inside it, including its subpackages.
+        Same as the collector's package roots, the packages are the folders with __init__.py below the app_dirs,
+        so neither the app_dirs themselves nor their parents, nor the folders of files outside them, are packages.
+        """
+        packages: Dict[str, Set[str]] = dict()
+        is_package: Dict[Path, bool] = dict()  # avoids checking the same folders for every file
+        app_dirs = set(self.collector.app_dirs)
+        for file_path, requirements in self.file_requirements().items():
+            folder = Path(file_path).parent
+            if folder not in app_dirs and not app_dirs.intersection(folder.parents):
+                continue
+            while folder not in app_dirs:
+                if folder not in is_package:
+                    is_package[folder] = self.collector.sources.is_file(folder / '__init__.py')
+                if not is_package[folder]:
+                    break
+                packages.setdefault(str(folder), set()).update(requirements)
+                folder = folder.parent
+        return {package: frozenset(requirements) for package, requirements in packages.items()}
@@ -0,0 +1,125 @@
+"""
+Read imports from the cached bytecode of a Python file, i.e. __pycache__/*.pyc,
+instead of parsing the source, when the bytecode is up to date with the source.
+
+Every import statement compiles to an IMPORT_NAME instruction preceded by loading the import level
+and the "fromlist" constants, e.g. `from ..pkg import a, b` loads 2 and ('a', 'b') and imports 'pkg'.
+Note that the compiler drops dead code, so imports under `if False:` are not in the bytecode.
+"""
+import dis
+import importlib.util
+import marshal
+import os
+from pathlib import Path
+from types import CodeType
+from typing import List, NamedTuple, Optional, Tuple, Union
+
+IMPORT_NAME = dis.opmap['IMPORT_NAME']
+# opcodes loading the level and the fromlist of an import, LOAD_SMALL_INT is used for the level since Python 3.14
+LOAD_CONST = dis.opmap['LOAD_CONST']
+LOAD_SMALL_INT = dis.opmap.get('LOAD_SMALL_INT')
+# inline cache entries following some instructions since Python 3.11
+CACHE = dis.opmap.get('CACHE')
+PYC_HEADER_SIZE = 16
+
+
+class BytecodeImport(NamedTuple):
+    """
+    An import found in the bytecode with the position of the import statement.
+    """
+
+    line: int
+    column: int
+    module: str  # empty for `from . import a`
+    level: int
+    fromlist: Optional[Tuple[str, ...]]  # None for `import a`
+
+
+def load_fresh_bytecode(file_path: Union[str, Path]) -> Optional[CodeType]:
+    """
+    Returns the code object from the cached bytecode of the Python file for the running interpreter,
+    or None if there is no cached bytecode or it doesn't match the source.
+    Same as the import system, timestamp-based files are checked against the source's mtime and size
+    and hash-based files against the source's hash.
+    """
+    try:
+        cache_path = importlib.util.cache_from_source(str(file_path))
+        with open(cache_path, 'rb') as f:
+            data = f.read()
+        source_stat = os.stat(file_path)
+    except (OSError, NotImplementedError):
+        return None
+
+    if len(data) < PYC_HEADER_SIZE or data[:4] != importlib.util.MAGIC_NUMBER:
+        return None
+    flags = int.from_bytes(data[4:8], 'little')
+    if flags & ~0b11:
+        return None
+    if flags & 0b1:
+        # hash-based pyc, validated even if it is unchecked, since the source may have been edited
+        with open(file_path, 'rb') as f:
+            if data[8:16] != importlib.util.source_hash(f.read()):
+                return None
+    else:
+        mtime = int.from_bytes(data[8:12], 'little')
+        size = int.from_bytes(data[12:16], 'little')
+        if mtime != int(source_stat.st_mtime) & 0xFFFFFFFF or size != source_stat.st_size & 0xFFFFFFFF:
+            return None
+
+    try:
+        code = marshal.loads(data[PYC_HEADER_SIZE:])
+    except (EOFError, ValueError, TypeError):
+        return None
+    return code if isinstance(code, CodeType) else None
+
+
+def get_bytecode_imports(code: CodeType) -> List[BytecodeImport]:
+    """
+    Returns the imports in the code object and all nested code objects, e.g. functions and classes,
+    sorted by their position in the source, which is the order the AST visits them.
+    """
+    imports: List[BytecodeImport] = []
+    code_objects = [code]
+    while code_objects:
+        current = code_objects.pop()
+        code_objects.extend(c for c in current.co_consts if isinstance(c, CodeType))
+        # most code objects don't import anything and are skipped without decoding the instructions
+        if IMPORT_NAME in current.co_code[::2]:
+            imports.extend(_get_code_imports(current))
+    # the sort is stable, so the imports at the same position, e.g. `import a, b`, keep the bytecode order
+    return sorted(imports, key=lambda i: (i.line, i.column))
+
+
+def _get_code_imports(code: CodeType) -> List[BytecodeImport]:
+    """
+    Decodes the instructions of a single code object and returns its imports.
+    This is much faster than dis.get_instructions, which builds an object for every instruction.
+    """
+    imports = []
+    raw = code.co_code
+    positions = list(code.co_positions()) if hasattr(code, 'co_positions') else None  # Python 3.11+
+    line_starts = dict(dis.findlinestarts(code)) if positions is None else dict()
+    line, column = code.co_firstlineno, 0
+    constants: List[object] = []
+    extended_arg = 0
+    for offset in range(0, len(raw), 2):
+        opcode, oparg = raw[offset], raw[offset + 1] | extended_arg
+        extended_arg = 0
+        if offset in line_starts:
+            line = line_starts[offset]
+        if opcode == dis.EXTENDED_ARG:
+            extended_arg = oparg << 8
+        elif opcode == CACHE:
+            continue
+        elif opcode == LOAD_CONST:
+            constants.append(code.co_consts[oparg])
+        elif opcode == LOAD_SMALL_INT:
+            constants.append(oparg)
+        elif opcode == IMPORT_NAME:
+            if positions is not None and positions[offset // 2][0] is not None:
+                line, column = positions[offset // 2][0], positions[offset // 2][2] or 0
+            level, fromlist = constants[-2:] if len(constants) >= 2 else (0, None)
+            imports.append(BytecodeImport(line, column, code.co_names[oparg], level, fromlist))
+        else:
+            constants.clear()
+    return imports
@@ -0,0 +1,129 @@
+"""
+The py2reqs command line, run with `python -m py2reqs`.
+
+    python -m py2reqs requirements app/main.py --app-dir .
+    python -m py2reqs collect app/main.py
+    python -m py2reqs explain pandas --path app/main.py
+    python -m py2reqs daemon
+
+Process startup is a large part of the latency of short queries, e.g. from pre-commit hooks,
+so the heavy modules (the collector, aspy.refactor_imports, ast, typing) are imported lazily.
+When a daemon is listening on the socket, the queries are answered by its warm collectors
+and none of the heavy modules are imported at all.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from functools import lru_cache
+
+from py2reqs.client import DEFAULT_SOCKET_PATH, build_request, query
+
+
+def _parser() -> argparse.ArgumentParser:
+    """
+    The parser of the command line arguments.
+    """
+    parser = argparse.ArgumentParser(prog='py2reqs', description="Navigate the dependencies of Python code.")
+    parser.add_argument('--socket', default=DEFAULT_SOCKET_PATH, help="the daemon's Unix socket, default: %(default)s")
+    parser.add_argument('--no-daemon', action='store_true', help="collect in this process even if a daemon is running")
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+
+    def add_command(name: str, help: str) -> argparse.ArgumentParser:
+        subparser = subparsers.add_parser(name, help=help)
+        subparser.add_argument(
+            '--app-dir',
+            action='append',
+            dest='app_dirs',
+            metavar='DIR',
+            help="a top-level application folder, can be repeated, default: the current folder",
+        )
+        return subparser
+
+    add_command('requirements', help="print the 3rd party top-level modules, one per line").add_argument(
+        'paths', nargs='+', metavar='path', help="a Python file or package folder"
+    )
+    add_command('collect', help="print the collected dependencies as JSON").add_argument(
+        'path', help="a Python file or package folder"
+    )
+    explain = add_command('explain', help="print the classification of a module as JSON")
+    explain.add_argument('module', help="a full module name")
+    explain.add_argument('--path', help="list the files importing the module in the dependencies of the path")
+    subparsers.add_parser('daemon', help="run the daemon until it is shut down")
+    subparsers.add_parser('shutdown', help="shut the daemon down")
+    return parser
+
+
+def _execute(request: dict[str, object], socket_path: str, use_daemon: bool) -> object:
+    """
+    Executes the request by the daemon if one is listening on the socket, otherwise in this process.
+    Raises ValueError on any failure, same as the daemon reports it.
+    """
+    if use_daemon and os.path.exists(socket_path):
+        try:
+            return query(socket_path=socket_path, **request)  # type: ignore
+        except OSError:
+            pass  # stale socket, fall back to collecting in this process
+    try:
+        return _local_daemon().handle(request)
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f"{type(e).__name__}: {e}") from e
+
+
+@lru_cache(maxsize=None)
+def _local_daemon():
+    """
+    The in-process daemon, so that the requests of a single invocation share the warm collectors.
+    """
+    from py2reqs.daemon import Py2ReqsDaemon
+
+    return Py2ReqsDaemon()
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Runs the command line and returns the exit status.
+    """
+    parser = _parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 0
+
+    if args.command == 'daemon':
+        from py2reqs.daemon import serve
+
+        serve(args.socket)
+        return 0
+    if args.command == 'shutdown':
+        try:
+            query('shutdown', socket_path=args.socket)
+        except OSError:
+            print(f"py2reqs: no daemon listening on {args.socket}", file=sys.stderr)
+            return 1
+        return 0
+
+    try:
+        if args.command == 'requirements':
+            requirements: set[str] = set()
+            for path in args.paths:
+                request = build_request('requirements', path=path, app_dirs=args.app_dirs)
+                requirements.update(_execute(request, args.socket, not args.no_daemon))  # type: ignore
+            print('\n'.join(sorted(requirements)))
+            return 0
+        elif args.command == 'collect':
+            request = build_request('collect', path=args.path, app_dirs=args.app_dirs)
+        else:
+            request = build_request('explain', module=args.module, path=args.path, app_dirs=args.app_dirs)
+        result = _execute(request, args.socket, not args.no_daemon)
+    except ValueError as e:
+        print(f"py2reqs: {e}", file=sys.stderr)
+        return 1
+
+    import json
+
+    print(json.dumps(result, indent=2, sort_keys=True))
+    return 0
@@ -0,0 +1,49 @@
+"""
+A lightweight client of the py2reqs daemon.
+
+This module is on the command line's fast path, so it only imports what a query needs and avoids
+the typing, pathlib and tempfile modules, the collector and the import classification machinery.
+"""
+from __future__ import annotations
+
+import os
+
+# same as tempfile.gettempdir() on the platforms with Unix sockets, without importing tempfile
+DEFAULT_SOCKET_PATH = os.path.join(os.environ.get('TMPDIR') or '/tmp', f'py2reqs-{os.getuid()}.sock')
+
+# commands taking the application folders
+COLLECTOR_COMMANDS = ('collect', 'requirements', 'explain')
+
+
+def build_request(command: str, **kwargs: object) -> dict[str, object]:
+    """
+    Returns the request of the command with the arguments.
+    Relative paths in "path" and "app_dirs" are resolved against the current working directory
+    of the client, which is also the default application folder.
+    """
+    request: dict[str, object] = dict(command=command, **kwargs)
+    if request.get('path'):
+        request['path'] = os.path.realpath(str(request['path']))
+    if command in COLLECTOR_COMMANDS:
+        app_dirs = request.get('app_dirs') or ['.']
+        request['app_dirs'] = [os.path.realpath(folder) for folder in app_dirs]  # type: ignore
+    return request
+
+
+def query(command: str, socket_path: str | os.PathLike = DEFAULT_SOCKET_PATH, **kwargs: object) -> object:
+    """
+    Sends a single request to the daemon and returns the result.
+    Raises ValueError if the daemon reports an error and OSError if the daemon is not running.
+    """
+    import json
+    import socket
+
+    request = build_request(command, **kwargs)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(socket_path))
+        sock.sendall(json.dumps(request).encode() + b'\n')
+        with sock.makefile('rb') as stream:
+            response = json.loads(stream.readline())
+    if not response['ok']:
+        raise ValueError(response['error'])
+    return response['result']
@@ -0,0 +1,237 @@
+"""
+A long-running daemon that keeps warm ImportsCollector instances and serves queries over a Unix socket.
+
+Every request and response is a single line of JSON. A request names the command and its arguments, e.g.
+    {"command": "requirements", "path": "/repo/app/main.py", "app_dirs": ["/repo"]}
+and the response is either {"ok": true, "result": ...} or {"ok": false, "error": "..."}.
+
+Supported commands:
+    ping          - check that the daemon is alive
+    collect       - collect the dependencies of a path
+    requirements  - list the 3rd party top-level modules required by a path
+    explain       - classify a module and list the collected files importing it
+    shutdown      - stop the daemon
+
+Collectors are kept per tuple of application folders. The parsed imports are re-used while the files
+and the folders containing them are unchanged, so adding a sibling module re-parses the files next to it.
+The results of every collected path are kept as well and returned as long as none of the visited files changed,
+which takes a couple of stat calls per file instead of walking the whole graph again.
+All caches of a collector are dropped when the contents of its application folders change.
+"""
+import copy
+import json
+import os
+import socketserver
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from py2reqs.client import DEFAULT_SOCKET_PATH, query
+from py2reqs.imports_collector import ImportsCollector
+
+# the attributes of ImportsCollector holding the results of a collection
+RESULT_ATTRIBUTES = (
+    'third_party',
+    'builtins',
+    'local',
+    'source_files',
+    'visited_files',
+    'dependencies',
+    'local_module_paths',
+    'module_files',
+)
+
+
+class CollectedResult(NamedTuple):
+    """
+    A copy of the collector's results for a path and the fingerprints of the visited files.
+    """
+
+    fingerprints: Dict[Path, Tuple[int, ...]]
+    results: Dict[str, Any]  # attribute name -> copy of the attribute
+
+
+class WarmCollector:
+    """
+    An ImportsCollector guarded by a lock, together with a snapshot of its application folders
+    used to detect when the classification of the top-level modules may have changed.
+    """
+
+    def __init__(self, app_dirs: List[str]) -> None:
+        self.collector = ImportsCollector(app_dirs)
+        self.lock = threading.Lock()
+        self._app_dirs_snapshot = self._snapshot()
+        self._results: Dict[str, CollectedResult] = dict()  # path -> results of its last collection
+
+    def _snapshot(self) -> List[int]:
+        """
+        Modification times of the application folders, which change when top-level modules are added or removed.
+        """
+        return [os.stat(folder).st_mtime_ns for folder in self.collector.app_dirs]
+
+    def refresh(self) -> None:
+        """
+        Drops all caches if the application folders changed. Must be called while holding the lock.
+        """
+        snapshot = self._snapshot()
+        if snapshot != self._app_dirs_snapshot:
+            self.collector.invalidate()
+            self._results.clear()
+            self._app_dirs_snapshot = snapshot
+
+    def _is_up_to_date(self, result: CollectedResult) -> bool:
+        """
+        Returns True if none of the visited files changed since the result was collected.
+        """
+        try:
+            return all(self.collector.fingerprint(f) == fp for f, fp in result.fingerprints.items())
+        except OSError:
+            # a visited file was deleted
+            return False
+
+    def collect(self, path: str) -> ImportsCollector:
+        """
+        Collects the dependencies of the path or, if none of the files visited by the last collection
+        of the path changed, restores its results. Must be called while holding the lock.
+        """
+        self.refresh()
+        self.collector.reset()
+        result = self._results.get(path)
+        if result is not None and self._is_up_to_date(result):
+            for name, value in result.results.items():
+                getattr(self.collector, name).update(value)
+            return self.collector
+        self.collector.collect_dependencies(path)
+        self._results[path] = CollectedResult(
+            {Path(f): fp for f, fp in self.collector.visited_fingerprints().items()},
+            {name: copy.copy(getattr(self.collector, name)) for name in RESULT_ATTRIBUTES},
+        )
+        return self.collector
+
+
+class Py2ReqsDaemon:
+    """
+    Dispatches the requests to warm collectors. Safe to use from multiple threads.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._collectors: Dict[Tuple[str, ...], WarmCollector] = dict()
+
+    def get_collector(self, app_dirs: Optional[List[str]] = None) -> WarmCollector:
+        """
+        Returns the warm collector for the application folders, creating it on the first use.
+        """
+        key = tuple(str(Path(folder).resolve()) for folder in (app_dirs or ['.']))
+        with self._lock:
+            warm = self._collectors.get(key)
+            if warm is None:
+                # the collectors find the local modules in their own app folders, so they don't share
+                # any import state, e.g. sys.path or the imported packages, with each other
+                warm = WarmCollector(list(key))
+                self._collectors[key] = warm
+        return warm
+
+    def handle(self, request: Dict[str, Any]) -> Any:
+        """
+        Executes a single request and returns its result.
+        """
+        command = request.get('command')
+        if command == 'ping':
+            return 'pong'
+        elif command == 'collect':
+            warm = self.get_collector(request.get('app_dirs'))
+            with warm.lock:
+                collector = warm.collect(request['path'])
+                return {
+                    'dependencies': dict(collector.dependencies),
+                    'third_party': sorted(collector.third_party),
+                    'local': sorted(collector.local),
+                    'builtins': sorted(collector.builtins),
+                }
+        elif command == 'requirements':
+            warm = self.get_collector(request.get('app_dirs'))
+            with warm.lock:
+                return sorted(warm.collect(request['path']).third_party)
+        elif command == 'explain':
+            return self.explain(request['module'], request.get('app_dirs'), request.get('path'))
+        else:
+            raise ValueError(f"Unknown command '{command}'.")
+
+    def explain(self, module: str, app_dirs: Optional[List[str]] = None, path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Classifies the module and, if the path is given, lists the files in its dependencies importing the module.
+        """
+        warm = self.get_collector(app_dirs)
+        with warm.lock:
+            if path:
+                collector = warm.collect(path)
+            else:
+                warm.refresh()
+                collector = warm.collector
+            return {
+                'module': module,
+                'top_level': module.partition('.')[0],
+                'import_type': collector.classify(module),
+                'path': collector.module_files.get(module),
+                'imported_by': sorted(f for f, modules in collector.dependencies.items() if module in modules),
+            }
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """
+    Reads JSON requests line by line until the client closes the connection.
+    """
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if request.get('command') == 'shutdown':
+                    response = {'ok': True, 'result': None}
+                    threading.Thread(target=self.server.shutdown).start()
+                else:
+                    response = {'ok': True, 'result': self.server.py2reqs_daemon.handle(request)}
+            except Exception as e:
+                response = {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(response).encode() + b'\n')
+            self.wfile.flush()
+
+
+class Py2ReqsServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    A threaded Unix socket server for Py2ReqsDaemon, one thread per connection.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: Union[str, Path] = DEFAULT_SOCKET_PATH) -> None:
+        self.socket_path = str(socket_path)
+        if os.path.exists(self.socket_path):
+            # refuse to take over the socket of a running daemon, but clean up a stale one
+            try:
+                query('ping', socket_path=self.socket_path)
+            except OSError:
+                os.unlink(self.socket_path)
+            else:
+                raise ValueError(f"A daemon is already listening on '{self.socket_path}'.")
+        self.py2reqs_daemon = Py2ReqsDaemon()
+        super().__init__(self.socket_path, _RequestHandler)
+
+    def server_close(self) -> None:
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def serve(socket_path: Union[str, Path] = DEFAULT_SOCKET_PATH) -> None:
+    """
+    Runs the daemon until it receives the shutdown command.
+    """
+    with Py2ReqsServer(socket_path) as server:
+        server.serve_forever()
+
+
+if __name__ == '__main__':
+    serve(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_SOCKET_PATH)
@@ -0,0 +1,361 @@
+"""
+An index of the distributions installed in the current environment built from their metadata,
+mapping top-level modules to distributions and distributions to their files and requirements.
+
+The requirements are expanded transitively with their extras, and their environment markers are evaluated
+for a target environment, by default the current one. The index is cached on disk across runs and rebuilt
+when any folder on the path changes, e.g. when a distribution is installed or removed.
+"""
+import dataclasses
+import hashlib
+import json
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple, Union
+
+from packaging.markers import default_environment
+from packaging.requirements import InvalidRequirement, Requirement
+
+try:
+    from importlib import metadata
+except ImportError:  # Python 3.7
+    import importlib_metadata as metadata  # type: ignore
+
+CACHE_FORMAT_VERSION = 1
+CACHE_DIR = Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / 'py2reqs'
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalizes a distribution name per PEP 503, e.g. "Foo.Bar_baz" -> "foo-bar-baz".
+    """
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+
+@dataclass
+class DistributionInfo:
+    """
+    Metadata of an installed distribution. The name is normalized.
+    The files and size include all files listed in RECORD, including the metadata itself.
+    """
+
+    name: str
+    version: str
+    files: int = 0
+    size: int = 0
+    requires: List[str] = field(default_factory=list)  # raw Requires-Dist entries
+    top_level: List[str] = field(default_factory=list)  # top-level modules provided by the distribution
+
+
+def _top_level_modules(distribution: 'metadata.Distribution') -> List[str]:
+    """
+    Reads top_level.txt or, if it is missing, derives the top-level modules from the files in RECORD.
+    """
+    text = distribution.read_text('top_level.txt')
+    if text:
+        return sorted({line.strip().replace('/', '.') for line in text.splitlines() if line.strip()})
+    modules = set()
+    for path in distribution.files or []:
+        parts = path.parts
+        if not parts or parts[0] == '..' or parts[0].endswith(('.dist-info', '.egg-info', '.data')):
+            continue
+        if len(parts) == 1:
+            name, _, extension = parts[0].partition('.')
+            if extension in ('py', 'pyc') or extension.endswith(('so', 'pyd')):
+                modules.add(name)
+        else:
+            modules.add(parts[0])
+    return sorted(modules - {'__pycache__'})
+
+
+def _file_sizes(distribution: 'metadata.Distribution') -> List[int]:
+    """
+    Returns the sizes of the distribution's files, using the sizes recorded in RECORD
+    and falling back to the installed files' sizes for the entries without one, e.g. *.pyc files.
+    """
+    sizes = []
+    for path in distribution.files or []:
+        if path.size is not None:
+            sizes.append(path.size)
+        else:
+            try:
+                sizes.append(os.stat(path.locate()).st_size)
+            except OSError:
+                sizes.append(0)
+    return sizes
+
+
+class DistributionIndex:
+    """
+    Reads the metadata of the installed distributions once and answers queries about them.
+    """
+
+    def __init__(
+        self,
+        distributions: Optional[Iterable['metadata.Distribution']] = None,
+        infos: Optional[Iterable[DistributionInfo]] = None,
+    ) -> None:
+        """
+        :param distributions: the distributions to index, default: all distributions on sys.path
+        :param infos: the already read metadata of the distributions, e.g. from the cache, instead of distributions
+        """
+        self.distributions: Dict[str, DistributionInfo] = dict()  # normalized name -> info
+        self.module_distributions: Dict[str, List[str]] = dict()  # top-level module -> distribution names
+        self._requirements: Dict[str, List[Requirement]] = dict()  # parsed Requires-Dist entries
+        self._closures: Dict[Tuple[str, FrozenSet[str], Tuple[Tuple[str, str], ...]], FrozenSet[str]] = dict()
+        self.from_cache: bool = False  # True if the index was read from the cache on disk
+
+        if infos is None:
+            infos = self._read_distributions(distributions if distributions is not None else metadata.distributions())
+        for info in infos:
+            if info.name in self.distributions:
+                # same as the import system, the first distribution on the path wins
+                continue
+            self.distributions[info.name] = info
+            for module in info.top_level:
+                self.module_distributions.setdefault(module, []).append(info.name)
+
+    @staticmethod
+    def _read_distributions(distributions: Iterable['metadata.Distribution']) -> Iterable[DistributionInfo]:
+        """
+        Reads the metadata of the distributions.
+        """
+        for distribution in distributions:
+            name = distribution.metadata['Name']
+            if not name:
+                continue
+            sizes = _file_sizes(distribution)
+            yield DistributionInfo(
+                name=normalize_name(name),
+                version=distribution.version,
+                files=len(sizes),
+                size=sum(sizes),
+                requires=list(distribution.requires or []),
+                top_level=_top_level_modules(distribution),
+            )
+
+    def distributions_for_module(self, module: str) -> List[str]:
+        """
+        Returns the names of the distributions providing the top-level package of the module.
+        """
+        top_module_name, _, _ = module.partition('.')
+        return self.module_distributions.get(top_module_name, [])
+
+    def _parsed_requirements(self, name: str) -> List[Requirement]:
+        """
+        The parsed Requires-Dist entries of the distribution, skipping the invalid ones.
+        """
+        requirements = self._requirements.get(name)
+        if requirements is None:
+            requirements = []
+            for requirement in self.distributions[name].requires:
+                try:
+                    requirements.append(Requirement(requirement))
+                except InvalidRequirement:
+                    pass
+            self._requirements[name] = requirements
+        return requirements
+
+    def _required(self, name: str, extra: str, environment: Dict[str, str]) -> List[Tuple[str, FrozenSet[str]]]:
+        """
+        Returns the installed distributions and their extras required by the distribution, or by one of its extras,
+        in the environment. An empty extra selects the requirements of the distribution itself.
+        """
+        required = []
+        for requirement in self._parsed_requirements(name):
+            if requirement.marker is None:
+                if extra:
+                    # unconditional requirements belong to the distribution itself, not to the extra
+                    continue
+            elif not requirement.marker.evaluate(dict(environment, extra=extra)):
+                continue
+            required_name = normalize_name(requirement.name)
+            if required_name in self.distributions:
+                required.append((required_name, frozenset(normalize_name(e) for e in requirement.extras)))
+        return required
+
+    def requires(
+        self, name: str, extras: Iterable[str] = (), environment: Optional[Dict[str, str]] = None
+    ) -> List[str]:
+        """
+        Returns the installed distributions directly required by the distribution with the extras.
+        :param environment: the marker variables of the target environment overriding the current ones,
+            e.g. {'python_version': '3.8', 'sys_platform': 'win32'}
+        """
+        name = normalize_name(name)
+        if name not in self.distributions:
+            return []
+        target = target_environment(environment)
+        required = set()
+        for extra in [''] + [normalize_name(e) for e in extras]:
+            required.update(r for r, _ in self._required(name, extra, target))
+        return sorted(required)
+
+    def _closure(self, name: str, extras: FrozenSet[str], environment: Dict[str, str]) -> FrozenSet[str]:
+        """
+        The distribution and all installed distributions it transitively requires with the extras
+        in the environment, memoized by the name, the extras and the environment.
+        """
+        key = (name, extras, tuple(sorted(environment.items())))
+        closure = self._closures.get(key)
+        if closure is None:
+            # the nodes are the distributions and their extras, where the empty extra is the distribution itself
+            visited: Set[Tuple[str, str]] = set()
+            stack = [(name, extra) for extra in {''} | extras]
+            while stack:
+                node = stack.pop()
+                if node in visited:
+                    continue
+                visited.add(node)
+                for required_name, required_extras in self._required(node[0], node[1], environment):
+                    stack.extend((required_name, extra) for extra in {''} | required_extras)
+            closure = self._closures[key] = frozenset(n for n, _ in visited)
+        return closure
+
+    def closure(
+        self,
+        names: Iterable[str],
+        extras: Optional[Dict[str, Iterable[str]]] = None,
+        environment: Optional[Dict[str, str]] = None,
+    ) -> Set[str]:
+        """
+        Returns the installed distributions and all distributions they transitively require.
+        :param extras: a map of the distribution names to their extras, e.g. {'requests': ['socks']}
+        :param environment: the marker variables of the target environment overriding the current ones
+        """
+        target = target_environment(environment)
+        selected_extras = {
+            normalize_name(n): frozenset(normalize_name(e) for e in x) for n, x in (extras or {}).items()
+        }
+        closure: Set[str] = set()
+        for name in names:
+            name = normalize_name(name)
+            if name in self.distributions:
+                closure |= self._closure(name, selected_extras.get(name, frozenset()), target)
+        return closure
+
+    def expand_third_party(
+        self,
+        third_party: Iterable[str],
+        extras: Optional[Dict[str, Iterable[str]]] = None,
+        environment: Optional[Dict[str, str]] = None,
+    ) -> Set[str]:
+        """
+        Returns the distributions providing the 3rd party top-level modules, e.g. ImportsCollector.third_party,
+        and all distributions they transitively require, i.e. all distributions that will be installed.
+        Modules without an installed distribution are skipped.
+        """
+        direct = set()
+        for module in third_party:
+            direct.update(self.distributions_for_module(module))
+        return self.closure(direct, extras, environment)
+
+
+def target_environment(environment: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Returns the marker variables of the current environment updated with the target environment's variables.
+    """
+    target = dict(default_environment())
+    target.update(environment or {})
+    return target
+
+
+def _has_distributions(entry: str) -> bool:
+    """
+    Returns True if the path entry may contain distributions: a site-packages folder, an egg
+    or a folder with distribution metadata, e.g. a project installed in development mode.
+    """
+    if os.path.basename(entry) in ('site-packages', 'dist-packages') or entry.endswith('.egg'):
+        return True
+    try:
+        return any(name.endswith(('.dist-info', '.egg-info')) for name in os.listdir(entry))
+    except OSError:
+        return False
+
+
+def distribution_path(path: Optional[List[str]] = None) -> List[str]:
+    """
+    Returns the entries of the path, default: sys.path, that may contain distributions.
+    The current folder ('') and the script's folder, i.e. sys.path[0] by default, are skipped,
+    so creating files in them doesn't invalidate the cached index and the cache doesn't depend on them.
+    """
+    if path is None:
+        path = sys.path
+        if not getattr(sys.flags, 'safe_path', False):  # Python 3.11+ -P doesn't add the script's folder
+            path = path[1:]
+    return [entry for entry in path if entry and _has_distributions(entry)]
+
+
+def _path_fingerprint(path: List[str]) -> List[Tuple[str, int]]:
+    """
+    The modification times of the existing path entries, which change when distributions are (un)installed.
+    """
+    fingerprint = []
+    for entry in path:
+        try:
+            fingerprint.append((entry, os.stat(entry or '.').st_mtime_ns))
+        except OSError:
+            pass
+    return fingerprint
+
+
+def default_cache_file(path: Optional[List[str]] = None) -> Path:
+    """
+    The cache file of the index for the current interpreter and the entries of the path that may contain
+    distributions, default: sys.path.
+    """
+    key = json.dumps([sys.executable, distribution_path(path)])
+    return CACHE_DIR / f'distributions-{hashlib.sha1(key.encode()).hexdigest()[:16]}.json'
+
+
+def load_distribution_index(
+    path: Optional[List[str]] = None, cache_file: Optional[Union[str, Path]] = None
+) -> DistributionIndex:
+    """
+    Returns the index of the distributions on the path, default: sys.path.
+    Only the path entries that may contain distributions are read, see distribution_path().
+    The index is read from the cache file if these entries are unchanged since it was written,
+    otherwise it is built from the distributions' metadata and written to the cache file.
+    No cache is used if the cache file is None.
+    """
+    path = distribution_path(path)
+    fingerprint = [list(f) for f in _path_fingerprint(path)]
+    if cache_file is not None:
+        try:
+            cached = json.loads(Path(cache_file).read_text())
+            if cached['version'] == CACHE_FORMAT_VERSION and cached['fingerprint'] == fingerprint:
+                index = DistributionIndex(infos=[DistributionInfo(**info) for info in cached['distributions']])
+                index.from_cache = True
+                return index
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    index = DistributionIndex(metadata.distributions(path=path))
+    if cache_file is not None:
+        cache = {
+            'version': CACHE_FORMAT_VERSION,
+            'fingerprint': fingerprint,
+            'distributions': [dataclasses.asdict(info) for info in index.distributions.values()],
+        }
+        try:
+            cache_file = Path(cache_file)
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            # write to a temporary file first, so concurrent runs never read a partial cache
+            tmp_file = cache_file.with_name(f'{cache_file.name}.{os.getpid()}.tmp')
+            tmp_file.write_text(json.dumps(cache))
+            os.replace(tmp_file, cache_file)
+        except OSError:
+            pass
+    return index
+
+
+@lru_cache(maxsize=None)
+def get_distribution_index() -> DistributionIndex:
+    """
+    Returns the index of the current environment, loaded on the first call from the cache on disk if it is up to date.
+    """
+    return load_distribution_index(cache_file=default_cache_file())
@@ -0,0 +1,104 @@
+"""
+Report the disk footprint of the 3rd party dependencies found by ImportsCollector:
+the files and bytes of each installed distribution, of its transitive requirements,
+and the cost each dependency adds to an entry point on top of all the other dependencies.
+"""
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+from py2reqs.distributions import DistributionIndex, get_distribution_index
+from py2reqs.imports_collector import ImportsCollector
+
+
+@dataclass
+class Footprint:
+    """
+    The footprint of a distribution directly required by an entry point.
+    The transitive numbers include the distribution itself and everything it requires.
+    The added numbers only count the distributions that no other direct dependency requires,
+    i.e. what removing this dependency would save.
+    """
+
+    distribution: str
+    files: int
+    size: int
+    transitive_files: int
+    transitive_size: int
+    added_files: int
+    added_size: int
+    requires: List[str] = field(default_factory=list)  # the transitive requirements, excluding itself
+
+
+@dataclass
+class FootprintReport:
+    """
+    The footprints of the dependencies ranked by the added size, largest first, and the totals.
+    Unresolved modules are 3rd party modules without an installed distribution.
+    """
+
+    footprints: List[Footprint] = field(default_factory=list)
+    distributions: List[str] = field(default_factory=list)  # all distributions, including the transitive ones
+    total_files: int = 0
+    total_size: int = 0
+    unresolved: List[str] = field(default_factory=list)
+
+
+def footprint_report(third_party: Iterable[str], index: Optional[DistributionIndex] = None) -> FootprintReport:
+    """
+    Builds the footprint report for the 3rd party top-level modules, e.g. ImportsCollector.third_party.
+    :param index: the index of the distributions, default: the cached index of the current environment
+    """
+    index = index or get_distribution_index()
+    report = FootprintReport()
+
+    direct = set()
+    for module in sorted(set(third_party)):
+        names = index.distributions_for_module(module)
+        if names:
+            direct.update(names)
+        else:
+            report.unresolved.append(module)
+
+    closure = index.closure(direct)
+    report.distributions = sorted(closure)
+    report.total_files = sum(index.distributions[d].files for d in closure)
+    report.total_size = sum(index.distributions[d].size for d in closure)
+
+    for name in direct:
+        info = index.distributions[name]
+        transitive = index.closure([name])
+        added = closure - index.closure(direct - {name})
+        report.footprints.append(
+            Footprint(
+                distribution=name,
+                files=info.files,
+                size=info.size,
+                transitive_files=sum(index.distributions[d].files for d in transitive),
+                transitive_size=sum(index.distributions[d].size for d in transitive),
+                added_files=sum(index.distributions[d].files for d in added),
+                added_size=sum(index.distributions[d].size for d in added),
+                requires=sorted(transitive - {name}),
+            )
+        )
+    report.footprints.sort(key=lambda f: (-f.added_size, -f.transitive_size, f.distribution))
+    return report
+
+
+def entry_points_footprints(
+    entry_points: Iterable[Union[str, Path]],
+    app_dirs: Optional[List[Union[str, Path]]] = None,
+    index: Optional[DistributionIndex] = None,
+) -> Dict[str, FootprintReport]:
+    """
+    Collects the dependencies of every entry point and builds its footprint report.
+    Returns a map of the entry point paths to their reports.
+    """
+    # one collector re-uses the parsed imports of the files shared by the entry points
+    collector = ImportsCollector(app_dirs)
+    reports = dict()
+    for entry_point in entry_points:
+        collector.reset()
+        collector.collect_dependencies(entry_point)
+        reports[str(Path(entry_point).resolve())] = footprint_report(collector.third_party, index)
+    return reports
@@ -0,0 +1,286 @@
+"""
+A persistent dependency graph stored in a local SQLite database.
+
+ImportsCollector writes into the store incrementally: the imports of every parsed file with the file's
+fingerprint, the import type of every top-level module and the file of every local module.
+On the next run, the imports of the unchanged files are read from the store instead of parsing the files.
+The files that were deleted or are no longer imported stay in the store until they are pruned.
+The queries, e.g. the reverse dependencies of a module or the 3rd party modules, run in SQLite
+using its indexes without loading the graph into memory.
+"""
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Union
+
+# stored in PRAGMA application_id to tell the stores apart from other SQLite databases: "p2rq"
+APPLICATION_ID = 0x70327271
+# stored in PRAGMA user_version, the tables of a store with another version are dropped and created again
+SCHEMA_VERSION = 2
+TABLES = ('meta', 'classifications', 'modules', 'edges', 'files')
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    fingerprint TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS edges (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    module TEXT NOT NULL,
+    PRIMARY KEY (file_id, module)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS edges_module ON edges(module);
+CREATE TABLE IF NOT EXISTS modules (
+    name TEXT PRIMARY KEY,
+    file_id INTEGER REFERENCES files(id) ON DELETE SET NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS modules_file_id ON modules(file_id);
+CREATE TABLE IF NOT EXISTS classifications (
+    top_level TEXT PRIMARY KEY,
+    import_type TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS classifications_import_type ON classifications(import_type);
+"""
+
+
+def _fingerprint_text(fingerprint: Sequence[int]) -> str:
+    """
+    The fingerprint as stored in the database, e.g. (1, 2, 3) -> '1,2,3'.
+    The numbers may exceed SQLite's 64-bit integers, so they are stored as text.
+    """
+    return ','.join(str(n) for n in fingerprint)
+
+
+class GraphStore:
+    """
+    The files, the modules they import, the files of the local modules and the import types
+    of the top-level modules. The file paths and module names are the same as in ImportsCollector.
+    The changes are visible to the queries immediately and persisted by commit().
+    The imports and the import types depend on the application folders, so a store belongs to
+    a single list of application folders, see bind_app_dirs(). The import types of the modules outside them
+    also depend on the Python environment and are updated whenever the modules are classified again.
+    """
+
+    def __init__(self, path: Union[str, Path] = ':memory:') -> None:
+        """
+        :param path: the database file, created if it doesn't exist, default: an in-memory database
+        Raises ValueError if the file is another database, which is left untouched.
+        """
+        self.path = str(path)
+        self.connection = sqlite3.connect(self.path)
+        try:
+            self._check_application_id()
+        except (ValueError, sqlite3.DatabaseError) as e:
+            self.connection.close()
+            raise ValueError(f"'{self.path}' is not a py2reqs graph store: {e}") from e
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        # the store is a cache that can be rebuilt, so durability is traded for faster writes
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.execute('PRAGMA synchronous = NORMAL')
+        if self.connection.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+            # the store is rebuilt rather than migrated, e.g. after the fingerprints changed
+            for table in TABLES:
+                self.connection.execute(f'DROP TABLE IF EXISTS {table}')
+            self.connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        self.connection.executescript(SCHEMA)
+
+    def _check_application_id(self) -> None:
+        """
+        Marks a new database as a store. Raises ValueError if the database is not empty and not a store.
+        """
+        application_id = self.connection.execute('PRAGMA application_id').fetchone()[0]
+        if application_id == APPLICATION_ID:
+            return
+        if application_id or self.connection.execute('SELECT 1 FROM sqlite_master LIMIT 1').fetchone():
+            raise ValueError(f"unknown application id {application_id}")
+        self.connection.execute(f'PRAGMA application_id = {APPLICATION_ID}')
+
+    def bind_app_dirs(self, app_dirs: Sequence[str]) -> None:
+        """
+        Records the application folders of the store on the first use.
+        Raises ValueError if the store was written for different application folders.
+        """
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'app_dirs'").fetchone()
+        if row is None:
+            self.connection.execute("INSERT INTO meta (key, value) VALUES ('app_dirs', ?)", (json.dumps(app_dirs),))
+        elif json.loads(row[0]) != list(app_dirs):
+            raise ValueError(
+                f"The graph store '{self.path}' belongs to the application directories {json.loads(row[0])}."
+            )
+
+    def close(self) -> None:
+        """
+        Commits the changes and closes the database.
+        """
+        self.connection.commit()
+        self.connection.close()
+
+    def __enter__(self) -> 'GraphStore':
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def commit(self) -> None:
+        """
+        Persists the changes.
+        """
+        self.connection.commit()
+
+    def _file_id(self, path: str) -> Optional[int]:
+        """
+        Returns the id of the file or None if the file is not in the store.
+        """
+        row = self.connection.execute('SELECT id FROM files WHERE path = ?', (path,)).fetchone()
+        return row[0] if row else None
+
+    def set_imports(self, path: str, fingerprint: Sequence[int], modules: List[str]) -> None:
+        """
+        Records the modules imported by the file with the fingerprint of the file, replacing the previous imports.
+        The fingerprint is a non-empty sequence of numbers, e.g. the file's modification time and size.
+        """
+        self.connection.execute(
+            'INSERT INTO files (path, fingerprint) VALUES (?, ?) '
+            'ON CONFLICT (path) DO UPDATE SET fingerprint = excluded.fingerprint',
+            (path, _fingerprint_text(fingerprint)),
+        )
+        file_id = self._file_id(path)
+        self.connection.execute('DELETE FROM edges WHERE file_id = ?', (file_id,))
+        self.connection.executemany(
+            'INSERT OR IGNORE INTO edges (file_id, module) VALUES (?, ?)', [(file_id, m) for m in modules]
+        )
+
+    def get_imports(self, path: str, fingerprint: Optional[Sequence[int]] = None) -> Optional[List[str]]:
+        """
+        Returns the sorted modules imported by the file, or None if the imports of the file are not recorded
+        or, when the fingerprint is given, the file changed since its imports were recorded.
+        """
+        row = self.connection.execute('SELECT id, fingerprint FROM files WHERE path = ?', (path,)).fetchone()
+        if row is None or not row[1] or (fingerprint is not None and row[1] != _fingerprint_text(fingerprint)):
+            return None
+        cursor = self.connection.execute('SELECT module FROM edges WHERE file_id = ? ORDER BY module', (row[0],))
+        return [module for (module,) in cursor]
+
+    def remove_file(self, path: str) -> None:
+        """
+        Removes the file and its imports, e.g. when the file is deleted.
+        """
+        self.connection.execute('DELETE FROM files WHERE path = ?', (path,))
+
+    def prune(self, keep: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Removes the files that no longer exist or, when the files to keep are given, all other files,
+        e.g. ImportsCollector.visited_files after collecting the dependencies of all entry points.
+        The local modules of the removed files are removed as well.
+        Returns the sorted paths of the removed files.
+        """
+        if keep is None:
+            paths = [path for (path,) in self.connection.execute('SELECT path FROM files')]
+            removed = sorted(path for path in paths if not os.path.exists(path))
+            self.connection.executemany('DELETE FROM files WHERE path = ?', [(path,) for path in removed])
+        else:
+            # the files to keep may be many, so they are joined in SQLite instead of passed as parameters
+            self.connection.execute('CREATE TEMP TABLE IF NOT EXISTS kept_files (path TEXT PRIMARY KEY)')
+            self.connection.execute('DELETE FROM kept_files')
+            self.connection.executemany('INSERT OR IGNORE INTO kept_files (path) VALUES (?)', [(p,) for p in keep])
+            cursor = self.connection.execute(
+                'SELECT path FROM files WHERE path NOT IN (SELECT path FROM kept_files) ORDER BY path'
+            )
+            removed = [path for (path,) in cursor]
+            self.connection.execute('DELETE FROM files WHERE path NOT IN (SELECT path FROM kept_files)')
+            self.connection.execute('DELETE FROM kept_files')
+        self.connection.execute('DELETE FROM modules WHERE file_id IS NULL')
+        return removed
+
+    def set_module_file(self, module: str, path: str) -> None:
+        """
+        Records the file of a local module. The file is added without imports if it's not in the store yet,
+        which is marked by an empty fingerprint.
+        """
+        self.connection.execute("INSERT OR IGNORE INTO files (path, fingerprint) VALUES (?, '')", (path,))
+        self.connection.execute(
+            'INSERT OR REPLACE INTO modules (name, file_id) VALUES (?, ?)', (module, self._file_id(path))
+        )
+
+    def get_module_file(self, module: str) -> Optional[str]:
+        """
+        Returns the file of a local module or None if it is not known.
+        """
+        row = self.connection.execute(
+            'SELECT files.path FROM modules JOIN files ON modules.file_id = files.id WHERE modules.name = ?',
+            (module,),
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_import_type(self, top_level: str, import_type: str) -> None:
+        """
+        Records the import type of a top-level module, see aspy.refactor_imports.classify.ImportType.
+        """
+        self.connection.execute(
+            'INSERT OR REPLACE INTO classifications (top_level, import_type) VALUES (?, ?)', (top_level, import_type)
+        )
+
+    def get_import_type(self, top_level: str) -> Optional[str]:
+        """
+        Returns the import type of a top-level module or None if it is not known.
+        """
+        row = self.connection.execute(
+            'SELECT import_type FROM classifications WHERE top_level = ?', (top_level,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def files(self) -> List[str]:
+        """
+        Returns the sorted paths of the files with recorded imports.
+        """
+        cursor = self.connection.execute("SELECT path FROM files WHERE fingerprint != '' ORDER BY path")
+        return [path for (path,) in cursor]
+
+    def reverse_dependencies(self, module: str, transitive: bool = False) -> List[str]:
+        """
+        Returns the sorted paths of the files importing the module or, when transitive is True,
+        also the files importing them through the local modules, directly or indirectly.
+        """
+        if not transitive:
+            query = (
+                'SELECT files.path FROM edges JOIN files ON edges.file_id = files.id '
+                'WHERE edges.module = ? ORDER BY files.path'
+            )
+        else:
+            query = """
+                WITH RECURSIVE importers(file_id) AS (
+                    SELECT file_id FROM edges WHERE module = ?
+                    UNION
+                    SELECT edges.file_id FROM importers
+                    JOIN modules ON modules.file_id = importers.file_id
+                    JOIN edges ON edges.module = modules.name
+                )
+                SELECT files.path FROM importers JOIN files ON importers.file_id = files.id ORDER BY files.path
+            """
+        return [path for (path,) in self.connection.execute(query, (module,))]
+
+    def third_party(self) -> List[str]:
+        """
+        Returns the sorted 3rd party top-level modules imported by any file.
+        """
+        return self.top_level_modules('THIRD_PARTY')
+
+    def top_level_modules(self, import_type: str) -> List[str]:
+        """
+        Returns the sorted top-level modules of the import type imported by any file.
+        The imported modules include their parents, so every imported top-level module has its own edge.
+        """
+        cursor = self.connection.execute(
+            """
+            SELECT top_level FROM classifications
+            WHERE import_type = ? AND EXISTS (SELECT 1 FROM edges WHERE edges.module = top_level)
+            ORDER BY top_level
+            """,
+            (import_type,),
+        )
+        return [top_level for (top_level,) in cursor]
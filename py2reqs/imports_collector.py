@@ -6,13 +6,16 @@ For each import, classify the import into local, 3rd party, or system.
 Locate local dependency files and recursively extract their dependencies.
 """
 
+import sys
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Union
+from typing import Dict, List, Optional, Set, Tuple, Union
 
-from aspy.refactor_imports.classify import ImportType, _get_module_info, classify_import
+from aspy.refactor_imports.classify import ImportType, classify_import
 
+from py2reqs.graph_store import GraphStore
 from py2reqs.imports_extractor import ImportsExtractor
-from py2reqs.utils import get_python_file_path
+from py2reqs.sources import SourceProvider
+from py2reqs.utils import FILE_SYSTEM, get_python_file_path
 
 
 class ImportsCollector:
@@ -21,20 +24,36 @@ class ImportsCollector:
     Maintains a list of dependencies, paths, source files, 3rd party dependencies, etc.
     """
 
-    def __init__(self, app_dirs: Optional[List[Union[str, Path]]] = None, verbose: bool = False) -> None:
+    def __init__(
+        self,
+        app_dirs: Optional[List[Union[str, Path]]] = None,
+        verbose: bool = False,
+        use_bytecode: bool = False,
+        sources: Optional[SourceProvider] = None,
+        store: Optional[GraphStore] = None,
+    ) -> None:
         """
         Constructor initializes the collections.
         :param app_dirs: a list of top-level application folders, default: ('.',)
         :param verbose: when True, prints out all visited modules and files.
+        :param use_bytecode: when True, reads the imports from the up-to-date cached bytecode when available.
+            The imports in unreachable code, e.g. under `if False:`, are missing from the bytecode.
+        :param sources: the source provider, default: the file system.
+            The local modules are found by the provider in the app_dirs instead of the import system.
+        :param store: the persistent graph store, written incrementally while collecting.
+            The imports of the files unchanged since they were stored are read from the store instead of parsing.
+            Raises ValueError if the store was written for other app_dirs.
         """
         # TODO: maybe... check if app_dirs is a string and either raise an exception or convert it to list
+        self.sources = sources or FILE_SYSTEM
+        self.store = store
         app_dirs = app_dirs or ['.']
         self.app_dirs = []
         for folder in app_dirs:
-            path = Path(folder).resolve()
-            if not path.exists():
+            path = self.sources.resolve(folder)
+            if not self.sources.exists(path):
                 raise ValueError(f"Application directory '{folder}' does not exist.")
-            if not path.is_dir():
+            if not self.sources.is_dir(path):
                 raise ValueError(f"Application directory '{folder}' is not a directory.")
             self.app_dirs.append(path)
 
@@ -46,7 +65,59 @@ class ImportsCollector:
         self.visited_files: Set[str] = set()  # application module files that have been visited
         self.dependencies: Dict[str, List[str]] = dict()  # a map of file dependencies on modules
         self.local_module_paths: Dict[str, str] = dict()  # a map of local modules to their resolved paths
+        self.module_files: Dict[str, str] = dict()  # a map of all imported local modules to their files
+        if self.store is not None:
+            self.store.bind_app_dirs([str(folder) for folder in self.app_dirs])
         self._verbose: bool = verbose
+        self._use_bytecode: bool = use_bytecode
+
+        # caches surviving reset(): parsed imports keyed by file and validated by its fingerprint,
+        # and import types keyed by top-level module name
+        self._extracted: Dict[str, Tuple[Tuple[int, ...], List[str]]] = dict()
+        self._import_types: Dict[str, str] = dict()
+
+    def reset(self) -> None:
+        """
+        Clears the collected results, but keeps the parse and classification caches,
+        so that the next collection only re-reads files that changed.
+        """
+        self.third_party.clear()
+        self.builtins.clear()
+        self.local.clear()
+        self.files_to_visit.clear()
+        self.source_files.clear()
+        self.visited_files.clear()
+        self.dependencies.clear()
+        self.local_module_paths.clear()
+        self.module_files.clear()
+
+    def invalidate(self, path: Optional[Union[str, Path]] = None) -> None:
+        """
+        Drops the cached imports of a single file or, when the path is None,
+        all cached imports and import types. The file is removed from the store as well.
+        """
+        if path is None:
+            self._extracted.clear()
+            self._import_types.clear()
+        else:
+            # the file may have been deleted, so the path is not checked for existence
+            file_path = self.sources.resolve(path)
+            for file_key in (str(file_path), str(file_path / '__init__.py')):
+                self._extracted.pop(file_key, None)
+                if self.store is not None:
+                    self.store.remove_file(file_key)
+
+    def prune_store(self) -> List[str]:
+        """
+        Removes the files that were not visited, e.g. deleted or no longer imported files, from the store,
+        so that its queries only report the collected files. Call it after collecting the dependencies
+        of all entry points and before reset(). Returns the sorted paths of the removed files.
+        """
+        if self.store is None:
+            raise ValueError("The collector has no graph store.")
+        removed = self.store.prune(self.visited_files)
+        self.store.commit()
+        return removed
 
     def _find_package_root_in_app_dirs(self, source_path: Union[str, Path]) -> Optional[Path]:
         """
@@ -57,8 +128,8 @@ class ImportsCollector:
         package root is `app/package1`, whereas script1 is not in a package, so the package root
         will be None.
         """
-        path = Path(source_path).resolve()
-        if not path.exists():
+        path = self.sources.resolve(source_path)
+        if not self.sources.exists(path):
             raise ValueError(f"Path '{path}' does not exist.")
 
         for folder in self.app_dirs:
@@ -70,14 +141,14 @@ class ImportsCollector:
                     raise ValueError(f"Path {source_path} is one of the application directories.")
                 if len(relative_path.parts) == 1:
                     # path is in the folder
-                    if path.is_file():
+                    if self.sources.is_file(path):
                         # a file in the app dir => no package root
                         return None
-                    elif path.is_dir():
+                    elif self.sources.is_dir(path):
                         # a folder in the app dir => the package root is path
                         return path
                 else:
-                    return Path(folder).resolve() / relative_path.parts[0]
+                    return folder / relative_path.parts[0]
         return None
 
     def process_path(self, path: Union[str, Path]) -> None:
@@ -85,36 +156,118 @@ class ImportsCollector:
         Given the path, extracts imports using ImportsExtractor and
         calls process_modules on every found module.
         """
-        path = Path(path).resolve()
-        root_folder = self._find_package_root_in_app_dirs(path)
-        extractor = ImportsExtractor(path, package_root=root_folder)
-        self.dependencies[str(path)] = sorted(list(set(extractor.modules)))
-        for module in extractor.modules:
+        path = self.sources.resolve(path)
+        self._process_file(path, get_python_file_path(path, self.sources))
+
+    def _process_file(self, path: Path, file_path: Path) -> None:
+        """
+        Same as process_path, but the path is already resolved and file_path is its Python file,
+        which is the same as the path except for the packages, so the paths aren't resolved again.
+        """
+        modules = self._extract_modules(path, file_path)
+        self.dependencies[str(path)] = sorted(list(set(modules)))
+        for module in modules:
             self.process_module(module)
-        self.visited_files.add(str(get_python_file_path(path)))
+        self.visited_files.add(str(file_path))
+
+    def visited_fingerprints(self) -> Dict[str, Tuple[int, ...]]:
+        """
+        Returns the fingerprints of the visited files from when their imports were extracted,
+        e.g. to check later whether the collected results are still up to date.
+        """
+        return {file_path: self._extracted[file_path][0] for file_path in self.visited_files}
+
+    def fingerprint(self, file_path: Path) -> Tuple[int, ...]:
+        """
+        Returns the fingerprint of the imports of the Python file, which changes when the extracted imports
+        may change: the fingerprint of the file, e.g. its modification time and size, and of its folder,
+        because ImportsExtractor resolves `from module import x` to a sibling module if one exists,
+        and whether the imports are read from the bytecode, which misses the imports in unreachable code.
+        """
+        return self.sources.fingerprint(file_path) + (
+            self.sources.folder_fingerprint(file_path.parent),
+            int(self._use_bytecode),
+        )
+
+    def _extract_modules(self, path: Path, python_file: Path) -> List[str]:
+        """
+        Returns the modules imported by the Python file of the resolved path, reusing the cached result
+        while the fingerprint of the file is unchanged.
+        The result is looked up in memory first, then in the store.
+        """
+        file_path = str(python_file)
+        fingerprint = self.fingerprint(python_file)
+        cached = self._extracted.get(file_path)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+        if self.store is not None:
+            modules = self.store.get_imports(file_path, fingerprint)
+            if modules is not None:
+                self._extracted[file_path] = (fingerprint, modules)
+                return modules
+        root_folder = self._find_package_root_in_app_dirs(path)
+        extractor = ImportsExtractor(
+            path, package_root=root_folder, use_bytecode=self._use_bytecode, sources=self.sources
+        )
+        self._extracted[file_path] = (fingerprint, extractor.modules)
+        if self.store is not None:
+            self.store.set_imports(file_path, fingerprint, extractor.modules)
+        return extractor.modules
+
+    def classify(self, full_module_name: str) -> str:
+        """
+        Returns the ImportType of the module's top-level package, caching it by the top-level name.
+        The packages and modules in the app_dirs are application modules, same as when running from the app_dirs.
+        They are found by the source provider, so neither sys.path nor the modules imported by earlier lookups,
+        e.g. of another collector in the same process, affect the result.
+        """
+        top_module_name, _, _ = full_module_name.partition('.')
+        import_type = self._import_types.get(top_module_name)
+        if import_type is None:
+            if top_module_name not in sys.builtin_module_names and self.sources.find_module(
+                top_module_name, self.app_dirs
+            ):
+                import_type = ImportType.APPLICATION
+            else:
+                app_dirs = tuple([str(d) for d in self.app_dirs])
+                import_type = classify_import(top_module_name, app_dirs)
+            self._import_types[top_module_name] = import_type
+            if self.store is not None:
+                self.store.set_import_type(top_module_name, import_type)
+        return import_type
 
     def collect_dependencies(self, source_path: Union[str, Path]) -> None:
         """
         The main entry point for the class. The source path is a Python file
         or a folder. In the latter case, it is converted in __init__.py file.
         To process multiple files or all files in a folder, call this function
-        for each individual file.
+        for each individual file. The changes to the store are committed at the end.
         """
-        self.source_files.add(str(get_python_file_path(source_path)))
-        self.process_path(source_path)
+        path = self.sources.resolve(source_path)
+        file_path = get_python_file_path(path, self.sources)
+        self.source_files.add(str(file_path))
+        self._process_file(path, file_path)
         while len(self.files_to_visit):
-            self.process_path(self.files_to_visit.pop())
+            # the queued files are resolved already
+            file_path = Path(self.files_to_visit.pop())
+            self._process_file(file_path, file_path)
+        if self.store is not None:
+            self.store.commit()
 
     def _add_local_module(self, full_module_name: str) -> None:
         """
         Retrieve the file containing the module and add it to the queue for visits.
+        The module is looked up in the app_dirs without importing its parent packages.
         """
-        app_dirs = tuple([str(d) for d in self.app_dirs])
-        found, module_path, is_builtin = _get_module_info(
-            full_module_name,
-            application_dirs=app_dirs,
-        )
-        module_path = get_python_file_path(module_path)
+        if full_module_name in self.module_files:
+            return
+        module_path = self.sources.find_module(full_module_name, self.app_dirs)
+        if module_path is None:
+            raise ValueError(f"Module '{full_module_name}' is not found in the application directories.")
+        module_path = get_python_file_path(module_path, self.sources)
+        self.module_files[full_module_name] = str(module_path)
+        if self.store is not None:
+            self.store.set_module_file(full_module_name, str(module_path))
         if str(module_path) not in self.visited_files:
             if self._verbose:
                 print(f"Module path: {module_path}")
@@ -129,8 +282,7 @@ class ImportsCollector:
         if self._verbose:
             print(f"Processing module {full_module_name}")
         top_module_name, _, _ = full_module_name.partition('.')
-        app_dirs = tuple([str(d) for d in self.app_dirs])
-        import_type = classify_import(top_module_name, app_dirs)
+        import_type = self.classify(full_module_name)
 
         if self._verbose:
             print(f"Full name: {full_module_name}; Top name: {top_module_name}; Type: {str(import_type)}")
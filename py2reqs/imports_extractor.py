@@ -5,7 +5,9 @@ import ast
 from pathlib import Path
 from typing import List, Optional, Union
 
-from py2reqs.utils import get_module_from_path, get_module_parents, get_python_file_path
+from py2reqs.bytecode import get_bytecode_imports, load_fresh_bytecode
+from py2reqs.sources import SourceProvider
+from py2reqs.utils import FILE_SYSTEM, get_module_from_path, get_module_parents, get_python_file_path
 
 
 class ImportsExtractor(ast.NodeVisitor):
@@ -14,35 +16,63 @@ class ImportsExtractor(ast.NodeVisitor):
     including each imported module's parent package and subpackages.
     The package root folder must contain the file and is necessary to resolve relative imports.
     The default package root is the current working directory.
+    The files are read with the source provider, by default from the file system.
     The results are stored in the "modules" list.
     """
 
-    def __init__(self, path: Union[str, Path], package_root: Optional[Union[str, Path]] = None) -> None:
+    def __init__(
+        self,
+        path: Union[str, Path],
+        package_root: Optional[Union[str, Path]] = None,
+        use_bytecode: bool = False,
+        sources: Optional[SourceProvider] = None,
+    ) -> None:
         """
         Main function performing the imports extraction.
+        :param use_bytecode: when True, reads the imports from the cached bytecode if it is up to date with
+            the source, which is faster than parsing the source. Falls back to parsing the source otherwise.
+            The compiler drops unreachable code, so the imports under e.g. `if False:` or `if not __debug__:`
+            are missing from the bytecode, unlike from the source.
+        :param sources: the source provider, e.g. MemorySourceProvider for sources that are not on the disk.
         """
         if not path:
             raise ValueError("Empty path.")
-        path = Path(path).resolve()
+        self.sources = sources or FILE_SYSTEM
+        path = self.sources.resolve(path)
 
-        self.package_root = Path(package_root or '.').resolve()
-        if not self.package_root.exists():
+        self.package_root = self.sources.resolve(package_root or '.')
+        if not self.sources.exists(self.package_root):
             raise ValueError(f"Package root folder {package_root} does not exist.")
 
-        if not self.package_root.is_dir():
+        if not self.sources.is_dir(self.package_root):
             raise ValueError(f"Package root '{package_root}' is not a folder.")
 
-        if not (path.samefile(self.package_root) or str(self.package_root) in str(path.resolve())):
+        if not (path == self.package_root or str(self.package_root) in str(path)):
             raise ValueError(f"Path '{path}' is not located in the package root '{package_root}'.")
 
-        self.file_path: Path = get_python_file_path(path)
-        self.full_module_name = get_module_from_path(self.file_path, self.package_root)
+        self.file_path: Path = get_python_file_path(path, self.sources)
+        self.full_module_name = get_module_from_path(self.file_path, self.package_root, self.sources)
         self.imports: List[ast.Import] = []
         self.importsFrom: List[ast.ImportFrom] = []
         self.modules: List[str] = []
+        self.from_bytecode: bool = False  # True if the imports were read from the cached bytecode
 
-        ast_file = ast.parse(self.file_path.read_text())
-        self.visit(ast_file)
+        # in-memory sources have no cached bytecode, and an overlaid file may differ from the cached one
+        use_bytecode = use_bytecode and not self.sources.is_virtual(self.file_path)
+        code = load_fresh_bytecode(self.file_path) if use_bytecode else None
+        if code is not None:
+            # the AST nodes are not available, so imports and importsFrom stay empty
+            self.from_bytecode = True
+            for bytecode_import in get_bytecode_imports(code):
+                if bytecode_import.fromlist is None:
+                    self.add_import(bytecode_import.module)
+                else:
+                    self.add_import_from(
+                        bytecode_import.module or None, bytecode_import.level, bytecode_import.fromlist[0]
+                    )
+        else:
+            ast_file = ast.parse(self.sources.read_bytes(self.file_path))
+            self.visit(ast_file)
         self.add_module_parents()
 
     def visit_Import(self, node: ast.Import) -> None:
@@ -53,7 +83,7 @@ class ImportsExtractor(ast.NodeVisitor):
 
         # absolute imports - ignore indentation and just get all module names
         for name in node.names:
-            self.modules.append(name.name)
+            self.add_import(name.name)
 
     def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
         """
@@ -61,38 +91,47 @@ class ImportsExtractor(ast.NodeVisitor):
         """
         self.importsFrom.append(node)
 
-        if not node.level:
+        self.add_import_from(node.module, node.level, node.names[0].name)
+
+    def add_import(self, module: str) -> None:
+        """
+        Records the module of an absolute import: import module
+        """
+        self.modules.append(module)
+
+    def add_import_from(self, module: Optional[str], level: int, first_name: str) -> None:
+        """
+        Records the module of an import: from module import first_name, ...
+        The level is the number of leading dots of a relative import and the module is None for `from . import x`.
+        """
+        if not level:
             # absolute import: from subpackage1 import object1
-            assert node.module is not None  # true for node.level == 0
+            assert module is not None  # true for level == 0
             # This module can be either local in the same folder, or from another package.
             # We check if there's a local folder or a file matching the name of the module
-            parts = node.module.split('.')
+            parts = module.split('.')
             local_path = Path(*parts)
-            maybe_folder = Path(self.file_path.parent / local_path).resolve()
-            maybe_file = Path(self.file_path.parent / (str(local_path) + '.py')).resolve()
-            if maybe_folder.exists() or maybe_file.exists():
+            maybe_folder = self.sources.resolve(self.file_path.parent / local_path)
+            maybe_file = self.sources.resolve(self.file_path.parent / (str(local_path) + '.py'))
+            if self.sources.exists(maybe_folder) or self.sources.exists(maybe_file):
                 # local module, prepend the package root
                 self.modules.append(
-                    '.'.join(list(self.file_path.parent.relative_to(self.package_root.parent).parts) + [node.module])
+                    '.'.join(list(self.file_path.parent.relative_to(self.package_root.parent).parts) + [module])
                 )
             else:
                 # global module, save as is
-                self.modules.append(node.module)
-        elif not node.module:
+                self.modules.append(module)
+        elif not module:
             # relative import: from .. import subpackage1
             self.modules.append(
                 '.'.join(
-                    list(self.file_path.parents[node.level - 1].relative_to(self.package_root.parent).parts)
-                    + [node.names[0].name]
+                    list(self.file_path.parents[level - 1].relative_to(self.package_root.parent).parts) + [first_name]
                 )
             )
         else:
             # relative import: from ..subpackage1 import module5
             self.modules.append(
-                '.'.join(
-                    list(self.file_path.parents[node.level - 1].relative_to(self.package_root.parent).parts)
-                    + [node.module]
-                )
+                '.'.join(list(self.file_path.parents[level - 1].relative_to(self.package_root.parent).parts) + [module])
             )
 
     def add_module_parents(self):
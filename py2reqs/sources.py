@@ -0,0 +1,231 @@
+"""
+Source providers give ImportsExtractor and ImportsCollector access to the Python sources.
+
+The default provider reads the file system. The in-memory provider serves the sources from a mapping
+of paths to source text or bytes, e.g. generated code, without any disk I/O. The overlay provider serves
+the sources from a mapping on top of the real tree, e.g. unsaved editor buffers.
+"""
+import hashlib
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+SourceContent = Union[str, bytes]
+
+
+def _digest(data: bytes) -> int:
+    """
+    A 64-bit hash of the data, the same in every process unlike hash(), so the fingerprints of the in-memory
+    sources can be stored across runs, e.g. in GraphStore.
+    """
+    return int.from_bytes(hashlib.sha1(data).digest()[:8], 'big')
+
+
+class SourceProvider:
+    """
+    Reads the sources from the file system.
+    The paths passed to the methods other than resolve() must be resolved, i.e. absolute and normalized.
+    """
+
+    # True if some sources are not on the file system, so they can't be found by the import system
+    virtual: bool = False
+
+    def resolve(self, path: Union[str, Path]) -> Path:
+        """
+        Returns the absolute path.
+        """
+        return Path(path).resolve()
+
+    def exists(self, path: Path) -> bool:
+        """
+        Returns True if the file or folder exists.
+        """
+        return path.exists()
+
+    def is_dir(self, path: Path) -> bool:
+        """
+        Returns True if the path is a folder.
+        """
+        return path.is_dir()
+
+    def is_file(self, path: Path) -> bool:
+        """
+        Returns True if the path is a file.
+        """
+        return path.is_file()
+
+    def read_bytes(self, path: Path) -> bytes:
+        """
+        Returns the content of the file.
+        """
+        return path.read_bytes()
+
+    def is_virtual(self, path: Path) -> bool:
+        """
+        Returns True if the file is served from memory and not from the file system.
+        """
+        return False
+
+    def fingerprint(self, path: Path) -> Tuple[int, int]:
+        """
+        Returns a pair of numbers that changes when the file changes: its modification time and size.
+        """
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def folder_fingerprint(self, folder: Path) -> int:
+        """
+        Returns a number that changes when files or folders are added to or removed from the folder:
+        its modification time.
+        """
+        return os.stat(folder).st_mtime_ns
+
+    def python_files(self, folder: Path) -> List[Path]:
+        """
+        Returns all Python files in the folder and its subfolders, sorted.
+        """
+        return sorted(folder.rglob('*.py'))
+
+    def find_module(self, full_module_name: str, app_dirs: Iterable[Path]) -> Optional[Path]:
+        """
+        Returns the package folder or the Python file of the module in the first application folder
+        containing it, or None if the module is not found.
+        """
+        parts = full_module_name.split('.')
+        for folder in app_dirs:
+            module_path = folder.joinpath(*parts)
+            if self.is_file(module_path / '__init__.py'):
+                return module_path
+            if self.is_file(module_path.with_name(parts[-1] + '.py')):
+                return module_path.with_name(parts[-1] + '.py')
+        return None
+
+
+class MemorySourceProvider(SourceProvider):
+    """
+    Serves the sources from memory only, e.g. {'app/package/__init__.py': '', 'app/package/main.py': 'import os'}.
+    Relative paths are relative to the current working directory. The folders containing the sources exist
+    implicitly. Symbolic links are not resolved, because the paths are not looked up on the file system.
+    """
+
+    virtual = True
+
+    def __init__(self, sources: Optional[Mapping[Union[str, Path], SourceContent]] = None) -> None:
+        self._sources: Dict[Path, Tuple[int, bytes]] = dict()  # path -> (digest of the content, content)
+        self._folders: Dict[Path, int] = dict()  # folder -> number of sources inside it
+        self._folder_digests: Dict[Path, int] = dict()  # folder -> XOR of the digests of the paths inside it
+        for path, content in (sources or {}).items():
+            self.set_source(path, content)
+
+    def resolve(self, path: Union[str, Path]) -> Path:
+        return Path(os.path.abspath(path))
+
+    def set_source(self, path: Union[str, Path], content: SourceContent) -> None:
+        """
+        Adds or replaces a source.
+        """
+        path = self.resolve(path)
+        if path not in self._sources:
+            self._update_folders(path, 1)
+        data = content.encode() if isinstance(content, str) else content
+        self._sources[path] = (_digest(data), data)
+
+    def remove_source(self, path: Union[str, Path]) -> None:
+        """
+        Removes a source. Raises KeyError if it doesn't exist.
+        """
+        path = self.resolve(path)
+        del self._sources[path]
+        self._update_folders(path, -1)
+
+    def _update_folders(self, path: Path, count: int) -> None:
+        """
+        Counts the added (1) or removed (-1) source in its folders and updates the folders' digests.
+        The digests depend only on the paths inside the folders, no matter in which order they were added.
+        """
+        path_digest = _digest(str(path).encode())
+        for folder in path.parents:
+            self._folder_digests[folder] = self._folder_digests.get(folder, 0) ^ path_digest
+            self._folders[folder] = self._folders.get(folder, 0) + count
+            if not self._folders[folder]:
+                del self._folders[folder]
+                del self._folder_digests[folder]
+
+    def exists(self, path: Path) -> bool:
+        return path in self._sources or path in self._folders
+
+    def is_dir(self, path: Path) -> bool:
+        return path in self._folders
+
+    def is_file(self, path: Path) -> bool:
+        return path in self._sources
+
+    def read_bytes(self, path: Path) -> bytes:
+        if path not in self._sources:
+            raise FileNotFoundError(f"No source for '{path}'.")
+        return self._sources[path][1]
+
+    def is_virtual(self, path: Path) -> bool:
+        return path in self._sources
+
+    def fingerprint(self, path: Path) -> Tuple[int, int]:
+        """
+        Returns the digest of the content and the size of the source.
+        """
+        if path not in self._sources:
+            raise FileNotFoundError(f"No source for '{path}'.")
+        digest, content = self._sources[path]
+        return digest, len(content)
+
+    def folder_fingerprint(self, folder: Path) -> int:
+        """
+        Returns the digest of the paths of the sources inside the folder and its subfolders.
+        """
+        return self._folder_digests.get(folder, 0)
+
+    def python_files(self, folder: Path) -> List[Path]:
+        return sorted(p for p in self._sources if p.suffix == '.py' and folder in p.parents)
+
+
+class OverlaySourceProvider(MemorySourceProvider):
+    """
+    Serves the sources from memory on top of another provider, by default the file system.
+    The in-memory sources replace the files with the same paths and may add new files and folders.
+    """
+
+    def __init__(
+        self,
+        sources: Optional[Mapping[Union[str, Path], SourceContent]] = None,
+        base: Optional[SourceProvider] = None,
+    ) -> None:
+        self.base = base or SourceProvider()
+        super().__init__(sources)
+
+    def resolve(self, path: Union[str, Path]) -> Path:
+        return self.base.resolve(path)
+
+    def exists(self, path: Path) -> bool:
+        return super().exists(path) or self.base.exists(path)
+
+    def is_dir(self, path: Path) -> bool:
+        return super().is_dir(path) or self.base.is_dir(path)
+
+    def is_file(self, path: Path) -> bool:
+        return super().is_file(path) or self.base.is_file(path)
+
+    def read_bytes(self, path: Path) -> bytes:
+        return super().read_bytes(path) if super().is_file(path) else self.base.read_bytes(path)
+
+    def is_virtual(self, path: Path) -> bool:
+        return super().is_virtual(path) or self.base.is_virtual(path)
+
+    def fingerprint(self, path: Path) -> Tuple[int, int]:
+        return super().fingerprint(path) if super().is_file(path) else self.base.fingerprint(path)
+
+    def folder_fingerprint(self, folder: Path) -> int:
+        base_fingerprint = self.base.folder_fingerprint(folder) if self.base.is_dir(folder) else 0
+        # the base's modification time fits in 64 bits, so the in-memory digest goes above it
+        return base_fingerprint + (super().folder_fingerprint(folder) << 64)
+
+    def python_files(self, folder: Path) -> List[Path]:
+        return sorted(set(super().python_files(folder)) | set(self.base.python_files(folder)))
@@ -2,18 +2,23 @@
 Helper functions
 """
 from pathlib import Path, PurePath
-from typing import List, Union
+from typing import List, Optional, Union
 
+from py2reqs.sources import SourceProvider
 
-def get_python_file_path(path: Union[str, Path]) -> Path:
+FILE_SYSTEM = SourceProvider()
+
+
+def get_python_file_path(path: Union[str, Path], sources: Optional[SourceProvider] = None) -> Path:
     """
     Convert the path of a Python file or folder to an absolute path of the file
     """
-    file_path = Path(path).resolve()
-    if not file_path.exists():
+    sources = sources or FILE_SYSTEM
+    file_path = sources.resolve(path)
+    if not sources.exists(file_path):
         raise ValueError(f"File {file_path} does not exist.")
 
-    if file_path.is_dir():
+    if sources.is_dir(file_path):
         file_path = file_path / '__init__.py'
 
     file_extension = PurePath(file_path).suffix
@@ -37,12 +42,15 @@ def get_module_parents(full_module_name: str) -> List[str]:
     return parents
 
 
-def get_module_from_path(path: Union[Path, str], package_root: Union[Path, str]) -> str:
+def get_module_from_path(
+    path: Union[Path, str], package_root: Union[Path, str], sources: Optional[SourceProvider] = None
+) -> str:
     """
     Converts the path within the package_root to a full module name starting with the package.
     """
-    path = Path(path).resolve()
-    root = Path(package_root).resolve()
+    sources = sources or FILE_SYSTEM
+    path = sources.resolve(path)
+    root = sources.resolve(package_root)
     parts = list(path.parent.relative_to(root.parent).parts)
     if path.stem != '__init__':
         parts.append(path.stem)
@@ -17,7 +17,7 @@ Files/modules:
 """
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 
 
 @dataclass
@@ -228,5 +228,68 @@ def create_test_files(in_folder: Union[str, Path]):
             file_path.write_text(test_file.content)
 
 
+def create_files(in_folder: Union[str, Path], files: Dict[str, str]) -> None:
+    """Create the files, a map of paths relative to the provided folder to their content, and their folders."""
+    folder = Path(in_folder)
+    for path, content in files.items():
+        (folder / path).parent.mkdir(parents=True, exist_ok=True)
+        (folder / path).write_text(content)
+
+
+def generated_package_files(subpackages: int = 10, modules: int = 30) -> Dict[str, str]:
+    """
+    Files of a larger package for performance tests: gen_pkg/main.py imports the first module of every subpackage,
+    every module imports the next one in its subpackage and the last ones import numpy.
+    """
+    files = {'gen_pkg/__init__.py': ""}
+    files['gen_pkg/main.py'] = ''.join(f'from .sub{s}.module0 import x\n' for s in range(subpackages))
+    for s in range(subpackages):
+        files[f'gen_pkg/sub{s}/__init__.py'] = ""
+        for m in range(modules):
+            next_import = f'from .module{m + 1} import x\n' if m + 1 < modules else 'import numpy\n'
+            files[f'gen_pkg/sub{s}/module{m}.py'] = f'import os\nimport json\n{next_import}x = 1\n'
+    return files
+
+
+# Installed distributions for testing: name -> (top_level.txt or None to derive it from RECORD,
+# Requires-Dist entries, {file path: size})
+TEST_DISTRIBUTIONS: Dict[str, Tuple[Optional[str], List[str], Dict[str, int]]] = {
+    'alpha': ('alpha\n', ['beta (>=1.0)', "gamma ; extra == 'test'"], {'alpha/__init__.py': 1000}),
+    'beta': ('beta\n', ['delta'], {'beta/__init__.py': 2000, 'beta/core.py': 500}),
+    'gamma': ('gamma\n', [], {'gamma.py': 300}),
+    'delta': ('delta\n', [], {'delta/__init__.py': 4000}),
+    'Epsilon_Lib': (None, ['delta', 'not-installed'], {'eps_mod.py': 700}),
+    # requirements with extras and environment markers
+    'iota': (
+        'iota\n',
+        ["kappa[Fast] ; python_version >= '3'", "win_only ; sys_platform == 'win32'", "mu ; extra == 'test'"],
+        {'iota.py': 100},
+    ),
+    'kappa': ('kappa\n', ["nu ; extra == 'fast'"], {'kappa.py': 100}),
+    'win_only': ('win_only\n', [], {'win_only.py': 100}),
+    'mu': ('mu\n', ['not a valid requirement'], {'mu.py': 100}),
+    'nu': ('nu\n', [], {'nu.py': 100}),
+}
+
+
+def create_test_distributions(in_folder: Union[str, Path]) -> None:
+    """Create the TEST_DISTRIBUTIONS as if they were installed in the provided site-packages folder."""
+    folder = Path(in_folder).resolve()
+    for name, (top_level, requires, files) in TEST_DISTRIBUTIONS.items():
+        dist_info = f'{name}-1.0.dist-info'
+        (folder / dist_info).mkdir(parents=True)
+        metadata = f'Metadata-Version: 2.1\nName: {name}\nVersion: 1.0\n'
+        metadata += ''.join(f'Requires-Dist: {r}\n' for r in requires)
+        record = {f'{dist_info}/METADATA': metadata}
+        if top_level is not None:
+            record[f'{dist_info}/top_level.txt'] = top_level
+        record.update({path: 'x' * size for path, size in files.items()})
+        for path, content in record.items():
+            (folder / path).parent.mkdir(parents=True, exist_ok=True)
+            (folder / path).write_text(content)
+        lines = [f'{path},,{len(content)}' for path, content in record.items()] + [f'{dist_info}/RECORD,,']
+        (folder / dist_info / 'RECORD').write_text('\n'.join(lines) + '\n')
+
+
 if __name__ == '__main__':
     create_test_files('.')
@@ -0,0 +1,64 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from py2reqs.aggregator import RequirementsAggregator, strongly_connected_components
+from py2reqs.imports_collector import ImportsCollector
+from tests.fixtures import create_files
+
+# a package with an import cycle between module_a and module_b
+AGGREGATED_FILES = {
+    'aggregated_pkg/__init__.py': "",
+    'aggregated_pkg/module_a.py': "import requests\nfrom . import module_b\n",
+    'aggregated_pkg/module_b.py': "import os\nimport numpy.linalg\nfrom .module_a import foo\n",
+    'aggregated_pkg/module_c.py': "from .module_b import bar\n",
+    'aggregated_pkg/sub/__init__.py': "",
+    'aggregated_pkg/sub/module_d.py': "import yaml\n",
+}
+
+
+class TestAggregator(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.app_dir = Path(self.tmp_dir.name).resolve()
+        create_files(self.app_dir, AGGREGATED_FILES)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_strongly_connected_components(self):
+        graph = {'a': ['b'], 'b': ['a', 'c'], 'c': [], 'd': ['c', 'a']}
+        components = strongly_connected_components(graph)
+        self.assertListEqual([['c'], ['a', 'b'], ['d']], [sorted(c) for c in components])
+
+    def test_requirements(self):
+        package = self.app_dir / 'aggregated_pkg'
+        aggregator = RequirementsAggregator(ImportsCollector([self.app_dir]))
+        aggregator.collect([package])
+
+        requirements = aggregator.file_requirements()
+        self.assertEqual(6, len(requirements))
+        self.assertSetEqual({'numpy', 'requests'}, requirements[str(package / 'module_a.py')])
+        self.assertSetEqual({'numpy', 'requests'}, requirements[str(package / 'module_b.py')])
+        self.assertSetEqual({'numpy', 'requests'}, requirements[str(package / 'module_c.py')])
+        self.assertSetEqual({'yaml'}, requirements[str(package / 'sub' / 'module_d.py')])
+        self.assertSetEqual(set(), requirements[str(package / '__init__.py')])
+
+        packages = aggregator.package_requirements()
+        self.assertSetEqual({str(package), str(package / 'sub')}, set(packages))
+        self.assertSetEqual({'numpy', 'requests', 'yaml'}, packages[str(package)])
+        self.assertSetEqual({'yaml'}, packages[str(package / 'sub')])
+
+    def test_packages_below_app_dirs(self):
+        # the app dir is a package itself, but the packages start below it, same as the package roots
+        (self.app_dir / '__init__.py').write_text("")
+        aggregator = RequirementsAggregator(ImportsCollector([self.app_dir]))
+        aggregator.collect([self.app_dir / 'aggregated_pkg'])
+        packages = aggregator.package_requirements()
+        self.assertSetEqual(
+            {str(self.app_dir / 'aggregated_pkg'), str(self.app_dir / 'aggregated_pkg' / 'sub')}, set(packages)
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import py_compile
+import tempfile
+import unittest
+from pathlib import Path
+
+from py2reqs.bytecode import BytecodeImport, get_bytecode_imports, load_fresh_bytecode
+
+NESTED_IMPORTS = """\
+import os, sys
+from . import module3
+from ..pkg.sub import a, b
+from .. import *
+
+
+def foo():
+    import json.decoder as decoder
+
+    class Bar:
+        from collections import OrderedDict
+"""
+
+
+class TestBytecode(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.source = Path(self.tmp_dir.name) / 'nested.py'
+        self.source.write_text(NESTED_IMPORTS)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_load_fresh_bytecode(self):
+        # no cached bytecode
+        self.assertIsNone(load_fresh_bytecode(self.source))
+
+        for invalidation_mode in py_compile.PycInvalidationMode:
+            py_compile.compile(str(self.source), doraise=True, invalidation_mode=invalidation_mode)
+            self.assertIsNotNone(load_fresh_bytecode(self.source), invalidation_mode)
+
+        # edited source with a different size and mtime
+        py_compile.compile(str(self.source), doraise=True)
+        self.source.write_text(NESTED_IMPORTS + "import re\n")
+        stat = os.stat(self.source)
+        os.utime(self.source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5 * 10**9))
+        self.assertIsNone(load_fresh_bytecode(self.source))
+
+        # edited source with a hash-based pyc
+        py_compile.compile(
+            str(self.source), doraise=True, invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH
+        )
+        self.source.write_text(NESTED_IMPORTS + "import io\n")
+        self.assertIsNone(load_fresh_bytecode(self.source))
+
+    def test_get_bytecode_imports(self):
+        py_compile.compile(str(self.source), doraise=True)
+        imports = [(i.module, i.level, i.fromlist) for i in get_bytecode_imports(load_fresh_bytecode(self.source))]
+        expected = [
+            ('os', 0, None),
+            ('sys', 0, None),
+            ('', 1, ('module3',)),
+            ('pkg.sub', 2, ('a', 'b')),
+            ('', 2, ('*',)),
+            ('json.decoder', 0, None),
+            ('collections', 0, ('OrderedDict',)),
+        ]
+        self.assertListEqual(expected, imports)
+        self.assertIsInstance(get_bytecode_imports(compile("import os", 'x.py', 'exec'))[0], BytecodeImport)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import io
+import json
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+
+from py2reqs.cli import _execute, main
+from py2reqs.daemon import Py2ReqsServer
+
+THIS_FILE_FOLDER = Path(__file__).resolve().parent
+PROJECT_FOLDER = THIS_FILE_FOLDER.parent
+PACKAGE1_PATH = (THIS_FILE_FOLDER / Path('package1')).resolve()
+FILE_PATH_ABSOLUTE_IMPORT = str(PACKAGE1_PATH / 'absolute.py')
+FILE_PATH_INDENTED_IMPORT = str(PACKAGE1_PATH / 'absolute_indented.py')
+FILE_PATH_MODULE1 = str(PACKAGE1_PATH / 'module1.py')
+APP_DIR = str(THIS_FILE_FOLDER)
+
+# modules that must not be imported by the command line before they are needed
+HEAVY_MODULES = ['aspy.refactor_imports', 'ast', 'typing', 'py2reqs.imports_collector', 'packaging', 'socket']
+# the cumulative import time of py2reqs.cli, measured with `python -X importtime`
+IMPORT_TIME_BUDGET_MS = 50
+
+
+def run_main(*argv: str):
+    """Runs the command line and returns the exit status and the captured output."""
+    stdout, stderr = io.StringIO(), io.StringIO()
+    with redirect_stdout(stdout), redirect_stderr(stderr):
+        status = main(list(argv))
+    return status, stdout.getvalue(), stderr.getvalue()
+
+
+class TestCli(unittest.TestCase):
+    def test_lazy_imports(self):
+        code = f"import sys, py2reqs.cli; print([m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+        output = subprocess.run([sys.executable, '-c', code], cwd=PROJECT_FOLDER, capture_output=True, text=True)
+        self.assertEqual('[]', output.stdout.strip(), output.stderr)
+
+    def test_import_time_budget(self):
+        output = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'import py2reqs.cli'],
+            cwd=PROJECT_FOLDER,
+            capture_output=True,
+            text=True,
+        )
+        match = re.search(r'^import time:\s+\d+ \|\s+(\d+) \| py2reqs\.cli$', output.stderr, re.MULTILINE)
+        self.assertIsNotNone(match, output.stderr)
+        self.assertLess(int(match.group(1)) / 1000, IMPORT_TIME_BUDGET_MS)
+
+    def test_no_op(self):
+        output = subprocess.run([sys.executable, '-m', 'py2reqs'], cwd=PROJECT_FOLDER, capture_output=True, text=True)
+        self.assertEqual(0, output.returncode)
+        self.assertIn('usage: py2reqs', output.stdout)
+
+    def test_in_process(self):
+        args = [
+            '--no-daemon',
+            'requirements',
+            FILE_PATH_ABSOLUTE_IMPORT,
+            FILE_PATH_INDENTED_IMPORT,
+            '--app-dir',
+            APP_DIR,
+        ]
+        self.assertEqual((0, 'pandas\nthat\n', ''), run_main(*args))
+
+        status, output, _ = run_main('--no-daemon', 'collect', FILE_PATH_MODULE1, '--app-dir', APP_DIR)
+        self.assertEqual(0, status)
+        self.assertListEqual(['package1'], json.loads(output)['local'])
+
+        status, output, _ = run_main('--no-daemon', 'explain', 'os', '--app-dir', APP_DIR)
+        self.assertEqual('BUILTIN', json.loads(output)['import_type'])
+
+        status, _, error = run_main('--no-daemon', 'requirements', str(PACKAGE1_PATH / 'module5.py'))
+        self.assertEqual(1, status)
+        self.assertRegex(error, "does not exist")
+
+        # a malformed request fails the same way as in the daemon
+        with self.assertRaisesRegex(ValueError, "KeyError: 'path'"):
+            _execute({'command': 'collect', 'app_dirs': [APP_DIR]}, '', False)
+
+    def test_no_daemon(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            socket_path = str(Path(tmp_dir) / 'py2reqs.sock')
+            status, _, error = run_main('--socket', socket_path, 'shutdown')
+            self.assertEqual(1, status)
+            self.assertEqual(f"py2reqs: no daemon listening on {socket_path}\n", error)
+
+    def test_daemon(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            socket_path = str(Path(tmp_dir) / 'py2reqs.sock')
+            server = Py2ReqsServer(socket_path)
+            thread = threading.Thread(target=server.serve_forever)
+            thread.start()
+            try:
+                args = ['--socket', socket_path, 'requirements', FILE_PATH_ABSOLUTE_IMPORT, '--app-dir', APP_DIR]
+                self.assertEqual((0, 'pandas\n', ''), run_main(*args))
+            finally:
+                self.assertEqual(0, run_main('--socket', socket_path, 'shutdown')[0])
+                thread.join()
+                server.server_close()
+
+
+if __name__ == '__main__':
+    unittest.main()
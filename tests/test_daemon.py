@@ -0,0 +1,135 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from py2reqs.daemon import Py2ReqsServer, query
+from tests.fixtures import create_files, generated_package_files
+
+THIS_FILE_FOLDER = Path(__file__).resolve().parent
+PACKAGE1_PATH = (THIS_FILE_FOLDER / Path('package1')).resolve()
+FILE_PATH_MODULE1 = PACKAGE1_PATH / 'module1.py'
+FILE_PATH_ABSOLUTE_IMPORT = PACKAGE1_PATH / 'absolute.py'
+APP_DIRS = [str(THIS_FILE_FOLDER)]
+# the budget of a warm query on an unchanged package of about 300 files
+WARM_QUERY_BUDGET_MS = 10
+
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.socket_path = str(Path(self.tmp_dir.name) / 'py2reqs.sock')
+        self.server = Py2ReqsServer(self.socket_path)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self) -> None:
+        query('shutdown', socket_path=self.socket_path)
+        self.thread.join()
+        self.server.server_close()
+        self.tmp_dir.cleanup()
+
+    def test_queries(self):
+        self.assertEqual('pong', query('ping', socket_path=self.socket_path))
+
+        requirements = query('requirements', self.socket_path, path=FILE_PATH_ABSOLUTE_IMPORT, app_dirs=APP_DIRS)
+        self.assertListEqual(['pandas'], requirements)
+
+        result = query('collect', self.socket_path, path=FILE_PATH_MODULE1, app_dirs=APP_DIRS)
+        self.assertListEqual(['package1'], result['local'])
+        self.assertListEqual([], result['third_party'])
+        self.assertEqual(6, len(result['dependencies']))
+
+        # the warm collector is reset between the queries
+        requirements = query('requirements', self.socket_path, path=FILE_PATH_ABSOLUTE_IMPORT, app_dirs=APP_DIRS)
+        self.assertListEqual(['pandas'], requirements)
+
+        explained = query(
+            'explain', self.socket_path, module='pandas', path=FILE_PATH_ABSOLUTE_IMPORT, app_dirs=APP_DIRS
+        )
+        self.assertEqual('THIRD_PARTY', explained['import_type'])
+        self.assertListEqual([str(FILE_PATH_ABSOLUTE_IMPORT)], explained['imported_by'])
+
+        with self.assertRaises(ValueError) as cm:
+            query('blah', socket_path=self.socket_path)
+        self.assertRegex(str(cm.exception), "Unknown command")
+
+        # a second daemon can't take over the socket
+        with self.assertRaises(ValueError) as cm:
+            Py2ReqsServer(self.socket_path)
+        self.assertRegex(str(cm.exception), "already listening")
+
+    def test_file_changes(self):
+        with tempfile.TemporaryDirectory() as app_dir:
+            package = Path(app_dir) / 'package'
+            package.mkdir()
+            (package / '__init__.py').write_text("")
+            script = package / 'script.py'
+            script.write_text("import pandas\n")
+            requirements = query('requirements', self.socket_path, path=script, app_dirs=[app_dir])
+            self.assertListEqual(['pandas'], requirements)
+
+            script.write_text("import numpy\nimport requests\n")
+            requirements = query('requirements', self.socket_path, path=script, app_dirs=[app_dir])
+            self.assertListEqual(['numpy', 'requests'], requirements)
+
+            # a new sibling module turns the 3rd party import into a local one
+            script.write_text("from helper import x\n")
+            requirements = query('requirements', self.socket_path, path=script, app_dirs=[app_dir])
+            self.assertListEqual(['helper'], requirements)
+            (package / 'helper.py').write_text("import yaml\nx = 1\n")
+            requirements = query('requirements', self.socket_path, path=script, app_dirs=[app_dir])
+            self.assertListEqual(['yaml'], requirements)
+
+    def test_repositories_are_isolated(self):
+        # two repositories with the same package name, whose collectors share the daemon process
+        requirements = []
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for name, third_party in [('a', 'numpy'), ('b', 'yaml'), ('c', 'requests')]:
+                repo = Path(tmp_dir) / name
+                (repo / 'app').mkdir(parents=True)
+                (repo / 'app' / '__init__.py').write_text("")
+                (repo / 'app' / 'sub.py').write_text(f"import {third_party}\n")
+                (repo / 'pkg').mkdir()
+                (repo / 'pkg' / '__init__.py').write_text("")
+                (repo / 'pkg' / 'main.py').write_text("import app.sub\n")
+                requirements.append(
+                    query('requirements', self.socket_path, path=repo / 'pkg' / 'main.py', app_dirs=[repo])
+                )
+            requirements.append(
+                query(
+                    'requirements',
+                    self.socket_path,
+                    path=Path(tmp_dir) / 'a' / 'pkg' / 'main.py',
+                    app_dirs=[Path(tmp_dir) / 'a'],
+                )
+            )
+        self.assertListEqual([['numpy'], ['yaml'], ['requests'], ['numpy']], requirements)
+
+    def test_warm_latency(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            app_dir = Path(tmp_dir).resolve()
+            create_files(app_dir, generated_package_files())
+            main = app_dir / 'gen_pkg' / 'main.py'
+            self.assertListEqual(['numpy'], query('requirements', self.socket_path, path=main, app_dirs=[app_dir]))
+
+            timings = []
+            for _ in range(5):
+                start = time.perf_counter()
+                requirements = query('requirements', self.socket_path, path=main, app_dirs=[app_dir])
+                timings.append((time.perf_counter() - start) * 1000)
+                self.assertListEqual(['numpy'], requirements)
+            self.assertLess(min(timings), WARM_QUERY_BUDGET_MS)
+
+            # a change deep in the graph is picked up by the next query
+            last_module = app_dir / 'gen_pkg' / 'sub9' / 'module29.py'
+            last_module.write_text("import numpy\nimport yaml\nx = 1\n")
+            os.utime(last_module, ns=(0, os.stat(last_module).st_mtime_ns + 1_000_000_000))
+            requirements = query('requirements', self.socket_path, path=main, app_dirs=[app_dir])
+            self.assertListEqual(['numpy', 'yaml'], requirements)
+
+
+if __name__ == '__main__':
+    unittest.main()
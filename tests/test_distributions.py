@@ -0,0 +1,126 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from py2reqs.distributions import (
+    DistributionIndex,
+    distribution_path,
+    get_distribution_index,
+    load_distribution_index,
+    metadata,
+    normalize_name,
+)
+from tests.fixtures import create_test_distributions
+
+
+def files_size(folder: Path, name: str) -> int:
+    """Total size of the files of a test distribution."""
+    record = (folder / f'{name}-1.0.dist-info' / 'RECORD').read_text()
+    return sum(os.stat(folder / line.split(',')[0]).st_size for line in record.splitlines())
+
+
+class TestDistributions(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.site_packages = Path(self.tmp_dir.name)
+        create_test_distributions(self.site_packages)
+        self.index = DistributionIndex(metadata.distributions(path=[str(self.site_packages)]))
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_normalize_name(self):
+        self.assertEqual('foo-bar-baz', normalize_name('Foo.Bar_baz'))
+
+    def test_index(self):
+        expected = {'alpha', 'beta', 'gamma', 'delta', 'epsilon-lib', 'iota', 'kappa', 'win-only', 'mu', 'nu'}
+        self.assertSetEqual(expected, set(self.index.distributions))
+
+        alpha = self.index.distributions['alpha']
+        self.assertEqual('1.0', alpha.version)
+        self.assertEqual(4, alpha.files)
+        self.assertEqual(files_size(self.site_packages, 'alpha'), alpha.size)
+
+        # top-level modules from top_level.txt or RECORD
+        self.assertListEqual(['beta'], self.index.distributions_for_module('beta.core'))
+        self.assertListEqual(['epsilon-lib'], self.index.distributions_for_module('eps_mod'))
+        self.assertListEqual([], self.index.distributions_for_module('pandas'))
+
+    def test_closure(self):
+        # the extra and the distributions that are not installed are skipped
+        self.assertListEqual(['beta'], self.index.requires('alpha'))
+        self.assertListEqual(['delta'], self.index.requires('Epsilon_Lib'))
+        self.assertSetEqual({'alpha', 'beta', 'delta'}, self.index.closure(['alpha']))
+        self.assertSetEqual({'alpha', 'beta', 'delta', 'epsilon-lib'}, self.index.closure(['alpha', 'epsilon-lib']))
+        self.assertSetEqual(set(), self.index.closure(['pandas']))
+
+    def test_markers_and_extras(self):
+        linux = {'sys_platform': 'linux'}
+        windows = {'sys_platform': 'win32'}
+        self.assertListEqual(['kappa'], self.index.requires('iota', environment=linux))
+        self.assertListEqual(['kappa', 'win-only'], self.index.requires('iota', environment=windows))
+        self.assertListEqual(['kappa', 'mu'], self.index.requires('iota', extras=['test'], environment=linux))
+        self.assertListEqual([], self.index.requires('iota', environment={'python_version': '2.7'}))
+
+        # kappa is required with its "fast" extra
+        self.assertSetEqual({'iota', 'kappa', 'nu'}, self.index.closure(['iota'], environment=linux))
+        self.assertSetEqual({'kappa'}, self.index.closure(['kappa']))
+        self.assertSetEqual({'kappa', 'nu'}, self.index.closure(['kappa'], extras={'Kappa': ['FAST']}))
+        expected = {'iota', 'kappa', 'nu', 'mu', 'win-only'}
+        self.assertSetEqual(expected, self.index.closure(['iota'], extras={'iota': ['test']}, environment=windows))
+
+        self.assertSetEqual(
+            {'alpha', 'beta', 'delta', 'iota', 'kappa', 'nu'},
+            self.index.expand_third_party({'alpha', 'iota', 'pandas'}, environment=linux),
+        )
+
+    def test_load_distribution_index(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        cache_file = Path(cache_dir.name) / 'py2reqs' / 'distributions.json'
+        path = [str(self.site_packages)]
+
+        index = load_distribution_index(path, cache_file)
+        self.assertFalse(index.from_cache)
+        self.assertTrue(cache_file.exists())
+
+        cached_index = load_distribution_index(path, cache_file)
+        self.assertTrue(cached_index.from_cache)
+        self.assertDictEqual(index.distributions, cached_index.distributions)
+        self.assertDictEqual(index.module_distributions, cached_index.module_distributions)
+
+        # installing a distribution changes the folder and invalidates the cache
+        (self.site_packages / 'omega-1.0.dist-info').mkdir()
+        (self.site_packages / 'omega-1.0.dist-info' / 'METADATA').write_text("Name: omega\nVersion: 1.0\n")
+        index = load_distribution_index(path, cache_file)
+        self.assertFalse(index.from_cache)
+        self.assertIn('omega', index.distributions)
+
+        # a corrupted cache is rebuilt
+        cache_file.write_text("{")
+        self.assertFalse(load_distribution_index(path, cache_file).from_cache)
+        self.assertTrue(load_distribution_index(path, cache_file).from_cache)
+
+    def test_distribution_path(self):
+        with tempfile.TemporaryDirectory() as work_dir:
+            path = ['', work_dir, str(self.site_packages), str(Path(work_dir) / 'missing')]
+            self.assertListEqual([str(self.site_packages)], distribution_path(path))
+
+            # files created in the folders without distributions don't invalidate the cache
+            cache_file = Path(work_dir) / 'cache' / 'distributions.json'
+            self.assertFalse(load_distribution_index(path, cache_file).from_cache)
+            (Path(work_dir) / 'notes.txt').write_text("")
+            self.assertTrue(load_distribution_index(path, cache_file).from_cache)
+
+    def test_get_distribution_index(self):
+        with tempfile.TemporaryDirectory() as cache_dir, mock.patch('py2reqs.distributions.CACHE_DIR', Path(cache_dir)):
+            get_distribution_index.cache_clear()
+            self.addCleanup(get_distribution_index.cache_clear)
+            self.assertIs(get_distribution_index(), get_distribution_index())
+            self.assertEqual(1, len(list(Path(cache_dir).glob('distributions-*.json'))))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from py2reqs.distributions import DistributionIndex, metadata
+from py2reqs.footprint import entry_points_footprints, footprint_report
+from tests.fixtures import create_test_distributions
+
+THIS_FILE_FOLDER = Path(__file__).resolve().parent
+PACKAGE1_PATH = (THIS_FILE_FOLDER / Path('package1')).resolve()
+FILE_PATH_ABSOLUTE_IMPORT = PACKAGE1_PATH / 'absolute.py'
+FILE_PATH_MODULE3 = PACKAGE1_PATH / 'subpackage1' / 'module3.py'
+APP_DIRS = [THIS_FILE_FOLDER]
+
+
+class TestFootprint(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        create_test_distributions(self.tmp_dir.name)
+        self.index = DistributionIndex(metadata.distributions(path=[self.tmp_dir.name]))
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_footprint_report(self):
+        sizes = {name: info.size for name, info in self.index.distributions.items()}
+        report = footprint_report({'alpha', 'eps_mod', 'pandas'}, self.index)
+
+        self.assertListEqual(['pandas'], report.unresolved)
+        self.assertListEqual(['alpha', 'beta', 'delta', 'epsilon-lib'], report.distributions)
+        self.assertEqual(sizes['alpha'] + sizes['beta'] + sizes['delta'] + sizes['epsilon-lib'], report.total_size)
+
+        # ranked by the added size, delta is shared and is not added by either
+        alpha, epsilon = report.footprints
+        self.assertEqual('alpha', alpha.distribution)
+        self.assertListEqual(['beta', 'delta'], alpha.requires)
+        self.assertEqual(sizes['alpha'], alpha.size)
+        self.assertEqual(sizes['alpha'] + sizes['beta'] + sizes['delta'], alpha.transitive_size)
+        self.assertEqual(sizes['alpha'] + sizes['beta'], alpha.added_size)
+        self.assertEqual(9, alpha.added_files)
+        self.assertEqual('epsilon-lib', epsilon.distribution)
+        self.assertEqual(sizes['epsilon-lib'], epsilon.added_size)
+
+        # a single dependency adds its whole transitive footprint
+        (alpha,) = footprint_report(['alpha'], self.index).footprints
+        self.assertEqual(alpha.transitive_size, alpha.added_size)
+
+    def test_entry_points_footprints(self):
+        reports = entry_points_footprints([FILE_PATH_ABSOLUTE_IMPORT, FILE_PATH_MODULE3], APP_DIRS, self.index)
+        self.assertListEqual(['pandas'], reports[str(FILE_PATH_ABSOLUTE_IMPORT)].unresolved)
+        self.assertListEqual([], reports[str(FILE_PATH_MODULE3)].unresolved)
+        self.assertEqual(0, reports[str(FILE_PATH_MODULE3)].total_size)
+
+
+if __name__ == '__main__':
+    unittest.main()
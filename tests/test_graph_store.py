@@ -0,0 +1,192 @@
+import compileall
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from py2reqs.graph_store import GraphStore
+from py2reqs.imports_collector import ImportsCollector
+from tests.fixtures import create_files
+
+PROJECT_FOLDER = Path(__file__).resolve().parent.parent
+# collects a generated module into the store in a new process, argv: the store, the app dir, the module's source
+COLLECT_MEMORY_SOURCES = """
+import sys
+from py2reqs.graph_store import GraphStore
+from py2reqs.imports_collector import ImportsCollector
+from py2reqs.sources import MemorySourceProvider
+
+db_file, app_dir, source = sys.argv[1:]
+sources = MemorySourceProvider({f'{app_dir}/generated/__init__.py': '', f'{app_dir}/generated/api.py': source})
+with GraphStore(db_file) as store:
+    collector = ImportsCollector([app_dir], sources=sources, store=store)
+    collector.collect_dependencies(f'{app_dir}/generated/api.py')
+    print(','.join(sorted(collector.third_party)))
+"""
+
+# module_a -> module_b -> sub.module_c
+STORED_FILES = {
+    'stored_pkg/__init__.py': "",
+    'stored_pkg/module_a.py': "import requests\nfrom .module_b import foo\n",
+    'stored_pkg/module_b.py': "import os\nfrom .sub.module_c import bar\n",
+    'stored_pkg/sub/__init__.py': "",
+    'stored_pkg/sub/module_c.py': "import numpy.linalg\n",
+}
+
+
+class TestGraphStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.app_dir = Path(self.tmp_dir.name).resolve() / 'app'
+        create_files(self.app_dir, STORED_FILES)
+        self.package = self.app_dir / 'stored_pkg'
+        self.db_file = Path(self.tmp_dir.name) / 'graph.db'
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def collect(self, store: GraphStore) -> ImportsCollector:
+        collector = ImportsCollector([self.app_dir], store=store)
+        collector.collect_dependencies(self.package / 'module_a.py')
+        return collector
+
+    def test_queries(self):
+        with GraphStore(self.db_file) as store:
+            collector = self.collect(store)
+
+        with GraphStore(self.db_file) as store:
+            self.assertListEqual(sorted(collector.visited_files), store.files())
+            module_a = str(self.package / 'module_a.py')
+            module_b = str(self.package / 'module_b.py')
+            self.assertListEqual(collector.dependencies[module_a], store.get_imports(module_a))
+            self.assertIsNone(store.get_imports(str(self.package / 'missing.py')))
+            self.assertEqual(
+                str(self.package / 'sub' / 'module_c.py'), store.get_module_file('stored_pkg.sub.module_c')
+            )
+            self.assertEqual('THIRD_PARTY', store.get_import_type('numpy'))
+            self.assertListEqual(['numpy', 'requests'], store.third_party())
+            self.assertListEqual(['os'], store.top_level_modules('BUILTIN'))
+
+            self.assertListEqual([module_b], store.reverse_dependencies('stored_pkg.sub.module_c'))
+            self.assertListEqual(
+                [module_a, module_b], store.reverse_dependencies('stored_pkg.sub.module_c', transitive=True)
+            )
+            self.assertListEqual([], store.reverse_dependencies('yaml', transitive=True))
+
+    def test_incremental(self):
+        module_c = self.package / 'sub' / 'module_c.py'
+        with GraphStore(self.db_file) as store:
+            self.collect(store)
+
+        # same size and modification time, so the stored imports are reused without parsing the file
+        stat = os.stat(module_c)
+        module_c.write_text("import yaml.scanner\n")
+        os.utime(module_c, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        with GraphStore(self.db_file) as store:
+            collector = self.collect(store)
+            self.assertSetEqual({'numpy', 'requests'}, collector.third_party)
+
+        # the file changed, so it is parsed again and its stored imports are replaced
+        os.utime(module_c, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        with GraphStore(self.db_file) as store:
+            collector = self.collect(store)
+            self.assertSetEqual({'requests', 'yaml'}, collector.third_party)
+            self.assertListEqual(['yaml', 'yaml.scanner'], store.get_imports(str(module_c)))
+            self.assertListEqual([str(module_c)], store.reverse_dependencies('yaml'))
+            self.assertListEqual(['requests', 'yaml'], store.third_party())
+
+            collector.invalidate(module_c)
+            self.assertNotIn(str(module_c), store.files())
+            self.assertIsNone(store.get_module_file('stored_pkg.sub.module_c'))
+
+    def test_prune(self):
+        old_module = self.package / 'old.py'
+        old_module.write_text("import yaml\n")
+        with GraphStore(self.db_file) as store:
+            collector = self.collect(store)
+            collector.collect_dependencies(old_module)
+            self.assertListEqual([], collector.prune_store())
+            self.assertListEqual(['numpy', 'requests', 'yaml'], store.third_party())
+
+        # the deleted file stays in the store until it is pruned
+        old_module.unlink()
+        with GraphStore(self.db_file) as store:
+            collector = self.collect(store)
+            self.assertIn(str(old_module), store.files())
+            self.assertListEqual([str(old_module)], collector.prune_store())
+            self.assertNotIn(str(old_module), store.files())
+            self.assertListEqual(['numpy', 'requests'], store.third_party())
+
+            # without the files to keep, only the files that no longer exist are removed
+            store.set_imports(str(old_module), (1, 2, 3), ['yaml'])
+            store.set_module_file('stored_pkg.old', str(old_module))
+            self.assertListEqual([str(old_module)], store.prune())
+            self.assertIsNone(store.get_module_file('stored_pkg.old'))
+            self.assertListEqual(sorted(collector.visited_files), store.files())
+
+    def test_app_dirs(self):
+        with GraphStore(self.db_file) as store:
+            self.collect(store)
+            ImportsCollector([self.app_dir], store=store)
+            with self.assertRaisesRegex(ValueError, "belongs to the application directories"):
+                ImportsCollector([self.package], store=store)
+
+        # a store with an older schema is rebuilt
+        with GraphStore(self.db_file) as store:
+            store.connection.execute('PRAGMA user_version = 1')
+        with GraphStore(self.db_file) as store:
+            self.assertListEqual([], store.files())
+            ImportsCollector([self.package], store=store)
+
+    def test_foreign_database(self):
+        connection = sqlite3.connect(self.db_file)
+        connection.execute('CREATE TABLE files (name TEXT)')
+        connection.execute("INSERT INTO files VALUES ('report.pdf')")
+        connection.commit()
+        connection.close()
+        with self.assertRaisesRegex(ValueError, "is not a py2reqs graph store"):
+            GraphStore(self.db_file)
+        connection = sqlite3.connect(self.db_file)
+        self.assertListEqual([('report.pdf',)], connection.execute('SELECT name FROM files').fetchall())
+        connection.close()
+
+        self.db_file.write_bytes(b"not a database" * 100)
+        with self.assertRaisesRegex(ValueError, "is not a py2reqs graph store"):
+            GraphStore(self.db_file)
+
+    def test_bytecode(self):
+        module_c = self.package / 'sub' / 'module_c.py'
+        module_c.write_text("import numpy\nif False:\n    import yaml\n")
+        self.assertTrue(compileall.compile_file(str(module_c), quiet=1))
+        with GraphStore(self.db_file) as store:
+            collector = ImportsCollector([self.app_dir], use_bytecode=True, store=store)
+            collector.collect_dependencies(module_c)
+            self.assertSetEqual({'numpy'}, collector.third_party)
+
+        # the imports read from the bytecode are not reused when parsing the source
+        with GraphStore(self.db_file) as store:
+            collector = ImportsCollector([self.app_dir], store=store)
+            collector.collect_dependencies(module_c)
+            self.assertSetEqual({'numpy', 'yaml'}, collector.third_party)
+
+    def test_memory_sources(self):
+        # the fingerprints of the in-memory sources are the same in every process, so the sources of the same
+        # size, which got the same per-process revisions before, are told apart
+        app_dir = str(Path(self.tmp_dir.name) / 'virtual')
+        third_party = []
+        for source in ('import numpy', 'import scipy', 'import scipy'):
+            output = subprocess.run(
+                [sys.executable, '-c', COLLECT_MEMORY_SOURCES, str(self.db_file), app_dir, source],
+                cwd=PROJECT_FOLDER,
+                capture_output=True,
+                text=True,
+            )
+            third_party.append(output.stdout.strip() or output.stderr)
+        self.assertListEqual(['numpy', 'scipy', 'scipy'], third_party)
+
+
+if __name__ == '__main__':
+    unittest.main()
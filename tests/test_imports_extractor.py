@@ -4,6 +4,9 @@ Testing the extraction of a list of modules from a Python file or __init__.py
 See fixtures.py for details of the test cases.
 """
 
+import compileall
+import shutil
+import tempfile
 import unittest
 from pathlib import Path
 
@@ -77,6 +80,44 @@ class TestImportsExtractor(unittest.TestCase):
         expected = ['package1.subpackage1', 'package1']
         self.assertListEqual(expected, extractor.modules)
 
+    def test_extract_from_bytecode(self):
+        """
+        The modules extracted from the cached bytecode are the same as from the source
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_folder = Path(tmp_dir).resolve()
+            for package in ('package1', 'package2'):
+                shutil.copytree(THIS_FILE_FOLDER / package, tmp_folder / package)
+            for name, expected_modules in {**PACKAGE1_EXPECTED_MODULES, **PACKAGE2_EXPECTED_MODULES}.items():
+                path = tmp_folder / TEST_FILES[name].path
+                package_root = tmp_folder / TEST_FILES[name].path.parts[0]
+
+                # no cached bytecode yet
+                extractor = ImportsExtractor(path, package_root, use_bytecode=True)
+                self.assertFalse(extractor.from_bytecode)
+
+                self.assertTrue(compileall.compile_file(str(path), quiet=1))
+                extractor = ImportsExtractor(path, package_root, use_bytecode=True)
+                self.assertTrue(extractor.from_bytecode)
+                self.assertListEqual(expected_modules, extractor.modules)
+                self.assertListEqual(expected_modules, ImportsExtractor(path, package_root).modules)
+
+    def test_bytecode_drops_unreachable_imports(self):
+        """
+        The imports in unreachable code are found in the source, but not in the bytecode
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            package_root = Path(tmp_dir).resolve() / 'dead_code'
+            package_root.mkdir()
+            path = package_root / 'module.py'
+            path.write_text("import os\nif False:\n    import yaml\nif not __debug__:\n    import numpy\n")
+            self.assertListEqual(['os', 'yaml', 'numpy'], ImportsExtractor(path, package_root).modules)
+
+            self.assertTrue(compileall.compile_file(str(path), quiet=1))
+            extractor = ImportsExtractor(path, package_root, use_bytecode=True)
+            self.assertTrue(extractor.from_bytecode)
+            self.assertListEqual(['os'], extractor.modules)
+
 
 if __name__ == '__main__':
     unittest.main()
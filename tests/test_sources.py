@@ -0,0 +1,110 @@
+import unittest
+from pathlib import Path
+
+from py2reqs.imports_collector import ImportsCollector
+from py2reqs.imports_extractor import ImportsExtractor
+from py2reqs.sources import MemorySourceProvider, OverlaySourceProvider
+from tests.fixtures import EXPECTED_DEPENDENCIES, PACKAGE1_EXPECTED_MODULES, TEST_FILES
+
+THIS_FILE_FOLDER = Path(__file__).resolve().parent
+# the in-memory application folder doesn't exist on the disk
+VIRTUAL_APP_DIR = Path('/virtual/app')
+APP_DIRS = [THIS_FILE_FOLDER]
+
+
+def create_memory_sources() -> MemorySourceProvider:
+    """The test files in memory."""
+    return MemorySourceProvider(
+        {VIRTUAL_APP_DIR / f.path: f.content for f in TEST_FILES.values() if f.content is not None}
+    )
+
+
+class TestSources(unittest.TestCase):
+    def setUp(self) -> None:
+        self.maxDiff = None
+
+    def test_memory_source_provider(self):
+        sources = create_memory_sources()
+        package1 = VIRTUAL_APP_DIR / 'package1'
+        self.assertFalse(VIRTUAL_APP_DIR.exists())
+        self.assertTrue(sources.is_dir(package1))
+        self.assertTrue(sources.is_file(package1 / 'module1.py'))
+        self.assertFalse(sources.exists(package1 / 'module5.py'))
+        self.assertEqual(TEST_FILES['package1_module1'].content.encode(), sources.read_bytes(package1 / 'module1.py'))
+        self.assertEqual(package1 / 'subpackage1' / '__init__.py', sources.python_files(package1)[-4])
+
+        revision, size = sources.fingerprint(package1 / 'module1.py')
+        sources.set_source(package1 / 'module1.py', b"import os\n")
+        self.assertNotEqual(revision, sources.fingerprint(package1 / 'module1.py')[0])
+        self.assertEqual(10, sources.fingerprint(package1 / 'module1.py')[1])
+
+        # the folder changes when a source is added or removed, but not when a source is replaced
+        folder_revision = sources.folder_fingerprint(package1)
+        sources.set_source(package1 / 'module1.py', b"import sys\n")
+        self.assertEqual(folder_revision, sources.folder_fingerprint(package1))
+        sources.set_source(package1 / 'helper.py', b"")
+        self.assertNotEqual(folder_revision, sources.folder_fingerprint(package1))
+        folder_revision = sources.folder_fingerprint(package1)
+        sources.remove_source(package1 / 'helper.py')
+        self.assertNotEqual(folder_revision, sources.folder_fingerprint(package1))
+
+        self.assertEqual(package1 / 'subpackage1', sources.find_module('package1.subpackage1', [VIRTUAL_APP_DIR]))
+        self.assertEqual(package1 / 'module1.py', sources.find_module('package1.module1', [VIRTUAL_APP_DIR]))
+        self.assertIsNone(sources.find_module('package1.module5', [VIRTUAL_APP_DIR]))
+
+        sources.remove_source(VIRTUAL_APP_DIR / 'package2' / 'module10.py')
+        sources.remove_source(VIRTUAL_APP_DIR / 'package2' / '__init__.py')
+        self.assertFalse(sources.exists(VIRTUAL_APP_DIR / 'package2'))
+        with self.assertRaises(FileNotFoundError):
+            sources.read_bytes(VIRTUAL_APP_DIR / 'package2' / '__init__.py')
+
+    def test_memory_extractor(self):
+        sources = create_memory_sources()
+        package_root = VIRTUAL_APP_DIR / 'package1'
+        for name, expected_modules in PACKAGE1_EXPECTED_MODULES.items():
+            extractor = ImportsExtractor(VIRTUAL_APP_DIR / TEST_FILES[name].path, package_root, sources=sources)
+            self.assertListEqual(expected_modules, extractor.modules)
+
+        with self.assertRaises(ValueError) as cm:
+            ImportsExtractor(package_root / 'module5.py', package_root, sources=sources)
+        self.assertRegex(str(cm.exception), "does not exist")
+
+    def test_memory_collector(self):
+        for key in EXPECTED_DEPENDENCIES.keys():
+            collector = ImportsCollector([VIRTUAL_APP_DIR], sources=create_memory_sources())
+            collector.collect_dependencies(VIRTUAL_APP_DIR / TEST_FILES[key].path)
+            expected_dependencies = [str(VIRTUAL_APP_DIR / TEST_FILES[d].path) for d in EXPECTED_DEPENDENCIES[key]]
+            self.assertListEqual(sorted(expected_dependencies), sorted(collector.dependencies.keys()))
+
+        sources = create_memory_sources()
+        collector = ImportsCollector([VIRTUAL_APP_DIR], sources=sources)
+        absolute_path = VIRTUAL_APP_DIR / TEST_FILES['package1_absolute'].path
+        collector.collect_dependencies(absolute_path)
+        self.assertSetEqual({'pandas'}, collector.third_party)
+        self.assertSetEqual({'os'}, collector.builtins)
+
+        # the edited source is parsed again
+        sources.set_source(absolute_path, "import numpy\nfrom . import module1\n")
+        collector.reset()
+        collector.collect_dependencies(absolute_path)
+        self.assertSetEqual({'numpy'}, collector.third_party)
+        self.assertSetEqual({'package1'}, collector.local)
+
+    def test_overlay_collector(self):
+        package1 = THIS_FILE_FOLDER / 'package1'
+        sources = OverlaySourceProvider(
+            {
+                # an unsaved edit of a file and a new file
+                package1 / 'absolute.py': "import requests\nfrom .subpackage1.generated import foo\n",
+                package1 / 'subpackage1' / 'generated.py': "import yaml\n",
+            }
+        )
+        collector = ImportsCollector(APP_DIRS, sources=sources, use_bytecode=True)
+        collector.collect_dependencies(package1 / 'absolute.py')
+        self.assertSetEqual({'requests', 'yaml'}, collector.third_party)
+        self.assertIn(str(package1 / 'subpackage1' / 'module3.py'), collector.dependencies)
+        self.assertFalse((package1 / 'subpackage1' / 'generated.py').exists())
+
+
+if __name__ == '__main__':
+    unittest.main()